@@ -1,68 +1,43 @@
 #!/usr/bin/env python3
 
-import time
 import os
 import logging
-import shutil
-from watchdog.events import FileSystemEventHandler
-from input.monitor import AudioMonitor
+from input.monitor import AudioMonitor, BaseAudioHandler
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from tqdm import tqdm
-import google.generativeai as genai
 
-from common.config import Config, init_environment
-from common.utils import setup_logging
+from common import services
+from common.config import init_environment
+from common.utils import get_file_size_mb, setup_logging
 from input.file_handler import AudioFileHandler
-from output.analyzer import TitleAnalyzer
-from processing.chunker import AudioChunker
-from output.formatter import TranscriptFormatter
-from processing.diarizer import SpeakerDiarizer
+from output.writer import write_file
 from processing.transcriber import GeminiTranscriber
 
 # Initialize environment and logging
 init_environment()
 setup_logging('audio_processor.log')
 
-# Initialize Google AI
-genai.configure(api_key=Config.get_google_api_key())
-
-class AudioTranscriptionHandler(FileSystemEventHandler):
+class AudioTranscriptionHandler(BaseAudioHandler):
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-pro')
-        self.title_analyzer = TitleAnalyzer(self.model)
-        self.transcript_formatter = TranscriptFormatter()
-        self.speaker_diarizer = SpeakerDiarizer()
-        self.file_handler = AudioFileHandler()
+        super().__init__()
+        # GeminiTranscriber and the shared analysis model both configure the
+        # Google AI client through services, so it's set up once per process
         self.transcriber = GeminiTranscriber()
+        self.model = services.get_model()
+        self.title_analyzer = services.get_title_analyzer()
+        self.transcript_formatter = services.get_transcript_formatter()
+        self.speaker_diarizer = services.get_speaker_diarizer()
+        self.file_handler = AudioFileHandler()
+        self._analysis_pool = ThreadPoolExecutor(max_workers=2)
         
-    def on_created(self, event):
-        if event.is_directory:
-            return
-        self._handle_event(event)
-
-    def on_modified(self, event):
-        if event.is_directory:
-            return
-        self._handle_event(event)
-
-    def _handle_event(self, event):
-        try:
-            file_path = event.src_path
-            
-            # Check if file is valid for processing
-            if not self.file_handler.is_valid_file(file_path):
-                return
-            
-            try:
-                # Wait a moment to ensure file is fully written
-                time.sleep(1)
-                self.process_audio_file(file_path)
-            finally:
-                self.file_handler.cleanup_processing(file_path)
-                
-        except Exception as e:
-            logging.error(f"Error handling event for {event.src_path}: {str(e)}")
-
+    def shutdown(self, wait: bool = True):
+        """Stop the event workers first, since they wait on analyses, then the analysis pool."""
+        super().shutdown(wait)
+        self._analysis_pool.shutdown(wait=wait, cancel_futures=True)
+        
+    def _is_valid_file(self, file_path: str) -> bool:
+        """Validate if file should be processed."""
+        return self.file_handler.is_valid_file(file_path)
 
     def transcribe_audio(self, wav_path):
         """
@@ -74,11 +49,17 @@ class AudioTranscriptionHandler(FileSystemEventHandler):
             logging.error(f"Transcription error: {str(e)}")
             raise
 
-    def process_audio_file(self, file_path):
-        """Process a new audio file for transcription and analysis."""
+    def process_audio_file(self, file_path, st=None):
+        """Process a new audio file for transcription and analysis; returns True on success."""
         try:
-            if not os.path.exists(file_path):
-                return
+            # Reuse the event handler's stat; otherwise one stat call serves
+            # as both the existence check and the size
+            if st is None:
+                try:
+                    st = os.stat(file_path)
+                except FileNotFoundError:
+                    return False
+            size_mb = get_file_size_mb(file_path, st)
                 
             # Prepare the audio file and get paths
             audio_copy_path, wav_file_to_process = self.file_handler.prepare_audio_file(file_path)
@@ -86,48 +67,56 @@ class AudioTranscriptionHandler(FileSystemEventHandler):
             
             # Get metadata
             filename = os.path.basename(file_path)
-            file_size = os.path.getsize(file_path)
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
             # Get transcription
             transcription = self.transcribe_audio(wav_file_to_process)
             
+            # Start the title analysis now; it only needs the transcription and
+            # runs while diarization, formatting and the transcript write proceed
+            analysis_future = self._analysis_pool.submit(self.title_analyzer.analyze_transcript, transcription)
+            
             # Process speaker diarization
             segments, speaker_mapping = self.speaker_diarizer.process_transcript(transcription)
             speaker_metadata = self.speaker_diarizer.format_metadata(speaker_mapping)
             
-            # Format and save transcription
+            # Format and save transcription; one clock read stamps both
+            processed = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             metadata = {
                 "File": filename,
-                "Size": f"{file_size / 1024 / 1024:.2f} MB",
-                "Processed": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "Size": f"{size_mb:.2f} MB",
+                "Processed": processed,
                 "speaker_mapping": speaker_mapping,
                 **speaker_metadata
             }
             formatted_transcript = self.transcript_formatter.format_transcript(
-                transcription, metadata)
+                transcription, metadata, generated_at=processed)
             
-            with open(transcript_path, 'w') as f:
-                f.write(formatted_transcript)
+            write_file(transcript_path, formatted_transcript)
                 
-            # Generate and save title analysis
-            analysis_text = self.title_analyzer.analyze_transcript(transcription)
-            self.title_analyzer.save_analysis(analysis_text, analysis_path)
+            # Save title analysis
+            analysis_text = analysis_future.result()
+            write_file(analysis_path, analysis_text)
             
             # Clean up temporary files
             self.file_handler.cleanup_processing(file_path, wav_path)
             
-            logging.info(f"\n{'='*50}")
-            logging.info(f"Audio file processed!")
-            logging.info(f"File: {filename}")
-            logging.info(f"Size: {file_size / 1024 / 1024:.2f} MB")
-            logging.info(f"Time: {timestamp}")
-            logging.info(f"Transcript saved to: {transcript_path}")
-            logging.info(f"Analysis saved to: {analysis_path}")
-            logging.info(f"{'='*50}\n")
+            rule = '=' * 50
+            logging.info(
+                f"\n{rule}\n"
+                f"Audio file processed!\n"
+                f"File: {filename}\n"
+                f"Size: {size_mb:.2f} MB\n"
+                f"Time: {timestamp}\n"
+                f"Transcript saved to: {transcript_path}\n"
+                f"Analysis saved to: {analysis_path}\n"
+                f"{rule}\n"
+            )
+            return True
                 
         except Exception as e:
             logging.error(f"Error processing file {file_path}: {str(e)}")
+            return False
 
 if __name__ == "__main__":
     # Your audio folder path
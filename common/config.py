@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 
 import os
+import functools
 import logging
 from dotenv import load_dotenv
 
+# Config below reads the environment when this module is imported, so .env
+# has to be loaded before the class body runs
+load_dotenv()
+
+@functools.lru_cache(maxsize=1)
 def init_environment():
-    """Initialize environment variables."""
+    """Initialize environment variables (only the first call does any work)."""
     load_dotenv()
     
     # Required environment variables
@@ -20,17 +26,30 @@ class Config:
     
     # Audio Processing Settings
     SUPPORTED_FORMATS = ('.wav', '.mp3', '.m4a')
-    MAX_CHUNK_SIZE_MB = 15.0
-    MIN_CHUNK_SIZE_MB = 10.0
+    # Smaller chunks get the first transcript back sooner and spread better
+    # across concurrent requests; override per network via the environment
+    MAX_CHUNK_SIZE_MB = float(os.getenv('MAX_CHUNK_SIZE_MB', '5.0'))
+    MIN_CHUNK_SIZE_MB = float(os.getenv('MIN_CHUNK_SIZE_MB', '3.0'))
     MIN_SILENCE_DURATION = 1.0
     
     # Audio Conversion Settings
-    AUDIO_SAMPLE_RATE = '44100'
+    # 16 kHz mono is what speech models consume; anything more is wasted bytes
+    AUDIO_SAMPLE_RATE = 16000
+    AUDIO_CHANNELS = 1
     AUDIO_CODEC = 'pcm_s16le'
     
     # File System Settings
     TRANSCRIPT_FOLDER = "transcripts"
     TEMP_PREFIX = 'audio_chunks_'
+    # Where chunk files are written; unset uses the system temp dir.
+    # On Linux, /dev/shm keeps chunks in memory instead of on disk.
+    TEMP_ROOT = os.getenv('TEMP_ROOT') or None
+    # Where detected silence points are kept between runs; unset disables the cache
+    CACHE_DIR = os.getenv('CACHE_DIR') or None
+    
+    # Cloud Storage bucket for staging Cloud Speech audio longer than a minute;
+    # unset sends audio inline, which the API caps at about 10 MB
+    SPEECH_BUCKET = os.getenv('SPEECH_BUCKET') or None
     
     @staticmethod
     def get_google_api_key():
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+import functools
+
+from common.config import Config
+from output.analyzer import TitleAnalyzer
+from output.formatter import TranscriptFormatter
+from processing.diarizer import SpeakerDiarizer
+
+# Try to import Google Generative AI
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+@functools.lru_cache(maxsize=1)
+def configure_genai() -> None:
+    """Configure the Google AI client once per process."""
+    if genai is None:
+        raise ImportError("google-generativeai package is required")
+    genai.configure(api_key=Config.get_google_api_key())
+
+@functools.lru_cache(maxsize=1)
+def get_model():
+    """Get the shared Gemini model used for analysis."""
+    configure_genai()
+    return genai.GenerativeModel('gemini-pro')
+
+@functools.lru_cache(maxsize=1)
+def get_title_analyzer():
+    """Get the shared TitleAnalyzer, backed by the shared model."""
+    return TitleAnalyzer(get_model())
+
+@functools.lru_cache(maxsize=1)
+def get_speaker_diarizer():
+    """Get the shared SpeakerDiarizer."""
+    return SpeakerDiarizer()
+
+@functools.lru_cache(maxsize=1)
+def get_transcript_formatter():
+    """Get the shared TranscriptFormatter."""
+    return TranscriptFormatter()
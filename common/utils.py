@@ -1,28 +1,121 @@
 #!/usr/bin/env python3
 
 import os
+import atexit
 import logging
+import logging.handlers
+import queue
+import shutil
 import subprocess
+import sys
+import time
+import wave
 from typing import Optional
 
-def setup_logging(log_file: str = 'audio_processor.log'):
-    """Setup logging configuration."""
+from common.config import Config
+
+# Try to import PyAV for in-process conversion
+try:
+    import av
+except ImportError:
+    av = None
+
+# Channel layouts for downmixing with PyAV
+_LAYOUTS = {1: 'mono', 2: 'stereo'}
+
+def setup_logging(log_file: str = 'audio_processor.log') -> logging.handlers.QueueListener:
+    """
+    Setup logging configuration.
+    
+    Records are handed to a queue and written to the log file and console by a
+    listener thread, so processing threads never block on log I/O. The log
+    file rotates at 10 MB, keeping five backups.
+    
+    Args:
+        log_file (str): Path of the log file
+        
+    Returns:
+        logging.handlers.QueueListener: The running listener
+    """
+    formatter = logging.Formatter('%(asctime)s - %(message)s')
+    handlers = [
+        logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=10_000_000, backupCount=5, encoding='utf-8'),
+        logging.StreamHandler()
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        
+    log_queue = queue.SimpleQueue()
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
+        format='%(message)s',  # The listener's handlers apply the real format
+        handlers=[logging.handlers.QueueHandler(log_queue)]
     )
+    
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
 
-def convert_to_wav(input_path: str, output_path: str) -> bool:
+def _convert_to_wav_av(input_path: str, output_path: str, sample_rate: int,
+                       channels: Optional[int]) -> None:
+    """Decode and resample to 16-bit PCM in-process with PyAV (channels=None keeps the source layout)."""
+    with av.open(input_path) as container:
+        stream = container.streams.audio[0]
+        source_channels = len(stream.layout.channels)
+        channels = channels or source_channels
+        
+        with wave.open(output_path, 'wb') as wav_file:
+            wav_file.setnchannels(channels)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            
+            layout = stream.layout.name if channels == source_channels else _LAYOUTS[channels]
+            resampler = av.AudioResampler(format='s16', layout=layout, rate=sample_rate)
+            for frame in container.decode(stream):
+                for out in resampler.resample(frame):
+                    wav_file.writeframes(out.to_ndarray().tobytes())
+            for out in resampler.resample(None):
+                wav_file.writeframes(out.to_ndarray().tobytes())
+
+def is_pcm16_wav(file_path: str, sample_rate: Optional[int] = None,
+                 channels: Optional[int] = None) -> bool:
     """
-    Convert audio to WAV format using ffmpeg.
+    Check whether a file is a 16-bit PCM WAV that can be transcribed as-is.
+    
+    Args:
+        file_path (str): Path to the file to check
+        sample_rate (int, optional): Sample rate the file must have; None accepts any
+        channels (int, optional): Channel count the file must have; None accepts any
+        
+    Returns:
+        bool: True for a matching 16-bit PCM WAV; False for other encodings,
+            other formats or unreadable files
+    """
+    try:
+        # The wave module only reads PCM; float, A-law etc. raise wave.Error
+        with wave.open(file_path, 'rb') as wav_file:
+            return (wav_file.getsampwidth() == 2
+                    and sample_rate in (None, wav_file.getframerate())
+                    and channels in (None, wav_file.getnchannels()))
+    except (wave.Error, EOFError, OSError):
+        return False
+
+def convert_to_wav(input_path: str, output_path: str,
+                   sample_rate: int = Config.AUDIO_SAMPLE_RATE,
+                   channels: Optional[int] = Config.AUDIO_CHANNELS) -> bool:
+    """
+    Convert audio to 16-bit PCM WAV format.
+    
+    Decodes in-process with PyAV when it's installed, avoiding an ffmpeg
+    process per file; otherwise (or if PyAV fails) runs ffmpeg.
     
     Args:
         input_path (str): Path to input audio file
         output_path (str): Path for output WAV file
+        sample_rate (int): Output sample rate in Hz
+        channels (int, optional): Output channel count; None keeps the source's
         
     Returns:
         bool: True if conversion successful
@@ -31,24 +124,42 @@ def convert_to_wav(input_path: str, output_path: str) -> bool:
         Exception: If ffmpeg conversion fails
     """
     try:
+        if av is not None:
+            try:
+                _convert_to_wav_av(input_path, output_path, sample_rate, channels)
+                return True
+            except Exception as e:
+                logging.debug(f"PyAV conversion failed, using ffmpeg: {str(e)}")
+                
         command = [
             'ffmpeg',
+            '-nostdin',
+            '-hide_banner',
+            '-loglevel', 'error',
             '-i', input_path,
             '-acodec', 'pcm_s16le',
-            '-ar', '44100',
+            '-ar', str(sample_rate),
+            *(['-ac', str(channels)] if channels else []),
             output_path,
             '-y'  # Overwrite output file if it exists
         ]
         
-        process = subprocess.Popen(
+        # Forward ffmpeg's (error-level) log as it arrives rather than
+        # buffering it all with communicate()
+        errors = []
+        with subprocess.Popen(
             command,
-            stdout=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
             stderr=subprocess.PIPE
-        )
-        stdout, stderr = process.communicate()
-        
+        ) as process:
+            for line in process.stderr:
+                line = line.decode(errors='replace').rstrip()
+                logging.debug(line)
+                errors.append(line)
+                
         if process.returncode != 0:
-            raise Exception(f"FFmpeg error: {stderr.decode()}")
+            raise Exception("FFmpeg error: " + "\n".join(errors))
             
         return True
         
@@ -56,11 +167,110 @@ def convert_to_wav(input_path: str, output_path: str) -> bool:
         logging.error(f"Error converting to WAV: {str(e)}")
         raise
 
+def _load_clonefile():
+    """Look up macOS clonefile(2), or return None where it isn't available."""
+    if sys.platform != 'darwin':
+        return None
+    try:
+        import ctypes
+        clonefile = ctypes.CDLL('/usr/lib/libSystem.B.dylib', use_errno=True).clonefile
+        clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+        clonefile.restype = ctypes.c_int
+        return clonefile
+    except (OSError, AttributeError):
+        return None
+
+_clonefile = _load_clonefile()
+
+def fast_copy(src: str, dst: str) -> None:
+    """
+    Copy a file's contents as cheaply as the platform allows.
+    
+    On APFS the copy is a copy-on-write clone that shares the source's blocks;
+    elsewhere shutil.copyfile uses the kernel's sendfile/fcopyfile fast path.
+    
+    Args:
+        src (str): Source file path
+        dst (str): Destination file path (must not exist for a clone)
+    """
+    if _clonefile is not None and _clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0:
+        return
+    shutil.copyfile(src, dst)
+
+def link_or_copy(src: str, dst: str, writable: bool = False) -> None:
+    """
+    Give dst the contents of src without copying bytes where possible.
+    
+    Uses an APFS clone where available (an independent copy). Otherwise a
+    hard link is tried, but only for a read-only dst: a link is the same
+    inode as src, so writing to it would change the original. Anything else
+    falls back to fast_copy. dst is replaced atomically, so an existing file
+    from an earlier source with the same name never survives.
+    
+    Args:
+        src (str): Source file path
+        dst (str): Destination file path
+        writable (bool): Whether dst will ever be opened for writing; if so
+            it is never hard-linked
+    """
+    # Staged under a name the monitors skip, then renamed over dst
+    staging = f"{dst}.partial"
+    if os.path.lexists(staging):
+        os.remove(staging)
+    try:
+        linked = False
+        if _clonefile is None and not writable:
+            try:
+                os.link(src, staging)
+                linked = True
+            except OSError:
+                pass
+        if not linked:
+            fast_copy(src, staging)
+        os.replace(staging, dst)
+    except BaseException:
+        if os.path.lexists(staging):
+            os.remove(staging)
+        raise
+
+def wait_for_stable_file(file_path: str, settle: float = 0.2, max_wait: float = 30.0) -> bool:
+    """
+    Wait until a file has stopped growing.
+    
+    Samples the file size and mtime every `settle` seconds and returns as soon
+    as two consecutive non-empty samples agree, so small files are picked up almost
+    immediately while large copies are given time to finish.
+    
+    Args:
+        file_path (str): Path to the file being written
+        settle (float): Seconds between size samples
+        max_wait (float): Maximum seconds to wait
+        
+    Returns:
+        bool: True if the file is stable, False if it vanished or kept changing
+    """
+    deadline = time.monotonic() + max_wait
+    previous = None
+    while time.monotonic() < deadline:
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            return False
+        # mtime catches same-size rewrites that the size alone would miss
+        current = (st.st_size, st.st_mtime_ns)
+        if current == previous and st.st_size > 0:
+            return True
+        previous = current
+        time.sleep(settle)
+    return False
+
 def ensure_dir_exists(directory: str) -> None:
     """Ensure a directory exists, create if it doesn't."""
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-def get_file_size_mb(file_path: str) -> float:
-    """Get file size in megabytes."""
-    return os.path.getsize(file_path) / (1024 * 1024)
\ No newline at end of file
+def get_file_size_mb(file_path: str, st: Optional[os.stat_result] = None) -> float:
+    """Get file size in megabytes, reusing a stat result when the caller has one."""
+    if st is None:
+        st = os.stat(file_path)
+    return st.st_size / (1024 * 1024)
\ No newline at end of file
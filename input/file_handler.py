@@ -2,19 +2,32 @@
 
 import os
 import logging
-import shutil
-import subprocess
 from typing import Optional, Tuple
 from pathlib import Path
 
+from common import utils
+from common.config import Config
+
 class AudioFileHandler:
     """Handles audio file operations and validation."""
     
     SUPPORTED_FORMATS = ('.wav', '.mp3', '.m4a')
+    _SUPPORTED_EXTENSIONS = frozenset(SUPPORTED_FORMATS)
+    
+    __slots__ = ('target_sr', 'target_channels')
     
-    def __init__(self):
-        """Initialize the AudioFileHandler."""
-        self.processing_files = set()
+    def __init__(self, target_sr: int = Config.AUDIO_SAMPLE_RATE,
+                 target_channels: Optional[int] = Config.AUDIO_CHANNELS):
+        """
+        Initialize the AudioFileHandler.
+        
+        Args:
+            target_sr (int): Sample rate of converted WAV files
+            target_channels (int, optional): Channel count of converted WAV files;
+                None keeps the source's
+        """
+        self.target_sr = target_sr
+        self.target_channels = target_channels
         
     def is_valid_file(self, file_path: str) -> bool:
         """
@@ -26,19 +39,13 @@ class AudioFileHandler:
         Returns:
             bool: True if file is valid for processing
         """
-        if not os.path.exists(file_path):
-            return False
-            
-        if file_path.endswith('.tmp'):
-            return False
-            
-        if not file_path.lower().endswith(self.SUPPORTED_FORMATS):
+        # Cheap string checks first; watchdog is chatty and most events are
+        # for files we ignore, so only survivors pay for the stat call.
+        # Lowering just the extension avoids copying the whole path.
+        if os.path.splitext(file_path)[1].lower() not in self._SUPPORTED_EXTENSIONS:
             return False
             
-        if file_path in self.processing_files:
-            return False
-            
-        return True
+        return os.path.exists(file_path)
         
     def get_transcript_paths(self, file_path: str) -> Tuple[str, str, str, str]:
         """
@@ -51,22 +58,23 @@ class AudioFileHandler:
             Tuple containing:
             - transcript_folder: Path to folder containing transcripts
             - audio_copy_path: Path where audio file will be copied
-            - wav_path: Path for WAV version of audio
+            - wav_path: Path for the converted WAV (never the audio copy's name)
             - transcript_path: Path for transcript file
             - analysis_path: Path for analysis file
         """
         filename = os.path.basename(file_path)
         file_dir = os.path.dirname(file_path)
         
-        # Create transcript folder path
-        transcript_folder = os.path.join(file_dir, "transcripts")
-        if not os.path.exists(transcript_folder):
-            os.makedirs(transcript_folder)
+        # Create transcript folder if needed; checked every time, since the
+        # user may move or delete it between files
+        transcript_folder = os.path.join(file_dir, Config.TRANSCRIPT_FOLDER)
+        os.makedirs(transcript_folder, exist_ok=True)
         
         # Generate file paths
         audio_copy_path = os.path.join(transcript_folder, filename)
         base_name = os.path.splitext(filename)[0]
-        wav_path = os.path.join(transcript_folder, f"{base_name}.wav")
+        # Distinct from audio_copy_path, which for .wav inputs has the same name
+        wav_path = os.path.join(transcript_folder, f"{base_name}_converted.wav")
         transcript_path = os.path.join(transcript_folder, f"{base_name}.md")
         analysis_path = os.path.join(transcript_folder, f"{base_name}_analysis.md")
         
@@ -81,70 +89,41 @@ class AudioFileHandler:
             
         Returns:
             Tuple containing:
-            - audio_copy_path: Path to copied audio file
+            - audio_copy_path: Path to copied audio file, or the original when
+              it is used in place
             - wav_file_to_process: Path to WAV file for processing
         """
-        # Prevent concurrent processing
-        if file_path in self.processing_files:
-            raise ValueError(f"File {file_path} is already being processed")
-        
-        self.processing_files.add(file_path)
+        # No separate existence check: callers have just stat'ed the file,
+        # and the copy/conversion below raises FileNotFoundError if it has gone
+        # Get paths
+        _, audio_copy_path, wav_path, _, _ = self.get_transcript_paths(file_path)
         
-        try:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File {file_path} does not exist")
-                
-            # Get paths
-            _, audio_copy_path, wav_path, _, _ = self.get_transcript_paths(file_path)
-            
-            # Copy original file if needed
-            if not os.path.exists(audio_copy_path):
-                shutil.copy2(file_path, audio_copy_path)
-            
-            # Convert to WAV if needed
-            if not file_path.lower().endswith('.wav'):
-                self.convert_to_wav(file_path, wav_path)
-                wav_file_to_process = wav_path
-            else:
-                wav_file_to_process = file_path
-                
-            return audio_copy_path, wav_file_to_process
+        # 16-bit PCM WAV already in the target format is used in place, with
+        # no copy or conversion
+        if (file_path.lower().endswith('.wav')
+                and utils.is_pcm16_wav(file_path, self.target_sr, self.target_channels)):
+            return file_path, file_path
             
-        except Exception as e:
-            self.processing_files.discard(file_path)
-            raise
+        # Archival copy, never written to (cloned on APFS, hard-linked on
+        # other filesystems, copied in-kernel as a last resort). Refreshed
+        # unless it is already a link to this very file, so a copy left by
+        # an earlier recording with the same name is replaced
+        if not (os.path.exists(audio_copy_path) and os.path.samefile(file_path, audio_copy_path)):
+            utils.link_or_copy(file_path, audio_copy_path)
+        
+        # Converted into its own file; the audio copy may share the source's inode
+        self.convert_to_wav(file_path, wav_path)
+        return audio_copy_path, wav_path
             
     def convert_to_wav(self, input_path: str, output_path: str) -> None:
         """
-        Convert audio to WAV format using ffmpeg.
+        Convert audio to WAV format.
         
         Args:
             input_path (str): Path to input audio file
             output_path (str): Path for output WAV file
         """
-        try:
-            command = [
-                'ffmpeg',
-                '-i', input_path,
-                '-acodec', 'pcm_s16le',
-                '-ar', '44100',
-                output_path,
-                '-y'  # Overwrite output file if it exists
-            ]
-            
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            stdout, stderr = process.communicate()
-            
-            if process.returncode != 0:
-                raise Exception(f"FFmpeg error: {stderr.decode()}")
-                
-        except Exception as e:
-            logging.error(f"Error converting to WAV: {str(e)}")
-            raise
+        utils.convert_to_wav(input_path, output_path, self.target_sr, self.target_channels)
             
     def cleanup_processing(self, file_path: str, wav_path: Optional[str] = None) -> None:
         """
@@ -154,8 +133,6 @@ class AudioFileHandler:
             file_path (str): Original file path
             wav_path (str, optional): Path to WAV file to clean up
         """
-        self.processing_files.discard(file_path)
-        
         if wav_path and os.path.exists(wav_path) and file_path != wav_path:
             try:
                 os.remove(wav_path)
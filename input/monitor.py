@@ -1,17 +1,39 @@
 #!/usr/bin/env python3
 
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import FileCreatedEvent, FileSystemEventHandler
 import logging
 import os
-import time
+import signal
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from common.config import Config
+from common.utils import wait_for_stable_file
 
 class BaseAudioHandler(FileSystemEventHandler, ABC):
     """Base handler for audio file processing."""
     
+    # Files processed concurrently; events are handed off so the watcher thread never blocks
+    EVENT_WORKERS = min(4, os.cpu_count() or 1)
+    
+    # In-progress files written by sync clients, browsers and editors
+    _SKIP_SUFFIXES = ('.tmp', '.partial', '.crdownload', '.part', '~')
+    _SKIP_PREFIXES = ('.', '~$')
+    
+    # Processed-file signatures remembered, least recently seen dropped first
+    PROCESSED_LIMIT = 1024
+    
     def __init__(self):
-        self.processing_files = set()
+        # Paths currently being processed; each event is set when its file is released
+        self.processing_files = {}
+        # (size, mtime_ns) of recently processed files; guarded by _lock
+        self._processed = OrderedDict()
+        self._lock = threading.Lock()
+        self._event_pool = ThreadPoolExecutor(max_workers=self.EVENT_WORKERS)
         
     def on_created(self, event):
         if event.is_directory:
@@ -27,31 +49,70 @@ class BaseAudioHandler(FileSystemEventHandler, ABC):
         try:
             file_path = event.src_path
             
-            # Skip temporary files
-            if file_path.endswith('.tmp'):
-                return
-                
-            # Skip if already processing
-            if file_path in self.processing_files:
+            # Skip temporary, partial and hidden files before any syscall
+            name = os.path.basename(file_path)
+            if name.startswith(self._SKIP_PREFIXES) or name.endswith(self._SKIP_SUFFIXES):
                 return
                 
             # Validate file type
             if not self._is_valid_file(file_path):
                 return
                 
-            # Add to processing set
-            self.processing_files.add(file_path)
-            
+            # Claim the file; drop duplicate events for one already in flight
+            with self._lock:
+                if file_path in self.processing_files:
+                    return
+                done = self.processing_files[file_path] = threading.Event()
+                
             try:
-                # Wait for file to be fully written
-                time.sleep(1)
-                self.process_audio_file(file_path)
-            finally:
-                # Always remove from processing set
-                self.processing_files.remove(file_path)
+                self._event_pool.submit(self._run, file_path, done)
+            except RuntimeError:
+                # Pool already shut down; we're stopping
+                self._release(file_path, done)
                 
         except Exception as e:
             logging.error(f"Error handling event for {event.src_path}: {str(e)}")
+            
+    def _run(self, file_path: str, done: threading.Event):
+        """Wait for a claimed file to settle, process it, then release the claim."""
+        try:
+            # Wait until the file has stopped growing
+            if not wait_for_stable_file(file_path):
+                logging.warning(f"File not ready, skipping for now: {file_path}")
+                return
+                
+            # Late modified events (metadata touches, sync clients) for a
+            # file whose content we've already processed are ignored
+            st = os.stat(file_path)
+            signature = (st.st_size, st.st_mtime_ns)
+            with self._lock:
+                if self._processed.get(file_path) == signature:
+                    self._processed.move_to_end(file_path)
+                    return
+                    
+            # Only successes are remembered, so a failed file is retried on its next event
+            if self.process_audio_file(file_path, st):
+                with self._lock:
+                    self._processed[file_path] = signature
+                    self._processed.move_to_end(file_path)
+                    if len(self._processed) > self.PROCESSED_LIMIT:
+                        self._processed.popitem(last=False)
+            
+        except Exception as e:
+            logging.error(f"Error handling event for {file_path}: {str(e)}")
+        finally:
+            # Always release the claim
+            self._release(file_path, done)
+            
+    def _release(self, file_path: str, done: threading.Event):
+        """Release a file's claim and wake anyone waiting on it."""
+        with self._lock:
+            del self.processing_files[file_path]
+        done.set()
+        
+    def shutdown(self, wait: bool = True):
+        """Stop accepting events and optionally wait for in-flight files to finish."""
+        self._event_pool.shutdown(wait=wait, cancel_futures=True)
 
     @abstractmethod
     def _is_valid_file(self, file_path: str) -> bool:
@@ -59,8 +120,8 @@ class BaseAudioHandler(FileSystemEventHandler, ABC):
         pass
 
     @abstractmethod
-    def process_audio_file(self, file_path: str):
-        """Process the audio file."""
+    def process_audio_file(self, file_path: str, st: Optional[os.stat_result] = None) -> bool:
+        """Process the audio file, reusing the caller's stat result when given; returns True on success."""
         pass
 
 class AudioMonitor:
@@ -83,11 +144,61 @@ class AudioMonitor:
         self.observer.schedule(self.handler, self.path, recursive=recursive)
         self.observer.start()
         
+        # Pick up files that arrived while we weren't running
+        self._backfill(recursive)
+        
+        # Park on the observer thread instead of waking every second; Ctrl-C
+        # (or SIGTERM) just asks the observer to stop
+        def _request_stop(signum, frame):
+            logging.info("\nStopping monitoring...")
+            self.observer.stop()
+            
+        # Signal handlers can only be installed from the main thread; when
+        # embedded elsewhere, the owner stops us with stop()
+        previous = {}
+        if threading.current_thread() is threading.main_thread():
+            previous = {sig: signal.signal(sig, _request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
         try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            self.stop()
+            self.observer.join()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            self.handler.shutdown()
+        logging.info("Monitoring stopped")
+        
+    def _backfill(self, recursive: bool) -> None:
+        """
+        Queue existing unprocessed audio files through the handler.
+        
+        Each file is dispatched as a created event, so it goes through the same
+        validation, deduplication and bounded worker pool as live events.
+        
+        Args:
+            recursive (bool): Whether to scan subdirectories
+        """
+        pending = [path for path in self._scan(self.path, recursive)
+                   if not self._has_transcript(path)]
+        if pending:
+            logging.info(f"Backfilling {len(pending)} existing audio files")
+        for path in pending:
+            self.handler.dispatch(FileCreatedEvent(path))
+            
+    def _scan(self, directory: str, recursive: bool) -> Iterator[str]:
+        """Yield supported audio files under a directory, skipping transcript folders."""
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and entry.name != Config.TRANSCRIPT_FOLDER:
+                        yield from self._scan(entry.path, recursive)
+                elif entry.name.lower().endswith(Config.SUPPORTED_FORMATS):
+                    yield entry.path
+                    
+    @staticmethod
+    def _has_transcript(file_path: str) -> bool:
+        """Check whether a file already has a transcript from an earlier run."""
+        directory, filename = os.path.split(file_path)
+        base_name = os.path.splitext(filename)[0]
+        return os.path.exists(os.path.join(directory, Config.TRANSCRIPT_FOLDER, f"{base_name}.md"))
             
     def stop(self):
         """Stop monitoring."""
@@ -95,4 +206,5 @@ class AudioMonitor:
             logging.info("\nStopping monitoring...")
             self.observer.stop()
             self.observer.join()
+            self.handler.shutdown()
             logging.info("Monitoring stopped")
\ No newline at end of file
@@ -7,6 +7,53 @@ from datetime import datetime
 class TitleAnalyzer:
     """Analyzes transcripts to generate title variations and insights."""
     
+    __slots__ = ('model',)
+    
+    # Fixed instruction part of the prompt, built once and shared by every call
+    _INSTRUCTIONS = {
+        "text": """Analyze this podcast transcript and generate creative titles. 
+                
+Task 1 - First identify:
+- Stewart's speaking style, tone, and patterns
+- Key themes and narrative arcs
+- Most memorable or surprising quotes
+- Guest's expertise and unique contributions
+
+Task 2 - Then generate 10 title variations that:
+- Capture both substance and intrigue
+- Balance clarity with creativity
+- Vary in style (questions, quotes, metaphors)
+- Reflect the authentic voice of the show
+
+Provide your analysis in this markdown format:
+
+# Episode Analysis
+
+## Key Elements Identified
+
+### Stewart's Style & Tone
+[List key patterns and expressions]
+
+### Core Themes
+[List main themes and key discussions]
+
+### Memorable Quotes
+[List standout quotes with context]
+
+### Guest Insights
+[List expertise areas and unique contributions]
+
+## Title Variations
+
+1. [Title]
+   - Drawing from: [elements used]
+   - Appeal: [why it works]
+
+[Continue for all 10 variations]
+
+Here's the transcript to analyze:"""
+    }
+    
     def __init__(self, model):
         """
         Initialize the TitleAnalyzer.
@@ -45,49 +92,10 @@ class TitleAnalyzer:
             list: List of prompt components
         """
         return [
+            self._INSTRUCTIONS,
             {
-                "text": """Analyze this podcast transcript and generate creative titles. 
-                
-Task 1 - First identify:
-- Stewart's speaking style, tone, and patterns
-- Key themes and narrative arcs
-- Most memorable or surprising quotes
-- Guest's expertise and unique contributions
-
-Task 2 - Then generate 10 title variations that:
-- Capture both substance and intrigue
-- Balance clarity with creativity
-- Vary in style (questions, quotes, metaphors)
-- Reflect the authentic voice of the show
-
-Provide your analysis in this markdown format:
-
-# Episode Analysis
-
-## Key Elements Identified
-
-### Stewart's Style & Tone
-[List key patterns and expressions]
-
-### Core Themes
-[List main themes and key discussions]
-
-### Memorable Quotes
-[List standout quotes with context]
-
-### Guest Insights
-[List expertise areas and unique contributions]
-
-## Title Variations
-
-1. [Title]
-   - Drawing from: [elements used]
-   - Appeal: [why it works]
-
-[Continue for all 10 variations]"""
-            },
-            {
-                "text": "Here's the transcript to analyze:\n\n" + transcript_text
+                # Passed through as-is; prefixing it would copy the whole transcript
+                "text": transcript_text
             }
         ]
     
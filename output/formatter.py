@@ -1,89 +1,99 @@
 #!/usr/bin/env python3
 
+import itertools
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Iterator, Optional, Dict
 
-class TranscriptFormatter:
-    """Handles formatting of transcript text into markdown format."""
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Markdown characters escaped in speaker names so they can't break the bold
+_MD_ESCAPE = str.maketrans({'*': r'\*', '_': r'\_', '`': r'\`', '[': r'\['})
+
+def format_transcript(raw_text: str,
+                      metadata: Optional[Dict] = None,
+                      generated_at: Optional[str] = None) -> str:
+    """
+    Convert raw transcript text to formatted markdown.
     
-    def __init__(self):
-        """Initialize the TranscriptFormatter."""
-        self.metadata = {}
+    Args:
+        raw_text (str): Raw transcript text
+        metadata (Dict, optional): Additional metadata like speakers, file info
+        generated_at (str, optional): Timestamp for the header, if the caller
+            already has one; defaults to now
         
-    def format_transcript(self, 
-                         raw_text: str, 
-                         metadata: Optional[Dict] = None) -> str:
-        """
-        Convert raw transcript text to formatted markdown.
-        
-        Args:
-            raw_text (str): Raw transcript text
-            metadata (Dict, optional): Additional metadata like speakers, file info
+    Returns:
+        str: Formatted markdown text
+    """
+    metadata = metadata or {}
+    
+    # Header with metadata, then the main content, joined with double
+    # newlines in one pass without an intermediate list
+    return "\n\n".join(itertools.chain(_create_header(metadata, generated_at),
+                                        _format_content(raw_text, metadata.get("speaker_mapping"))))
+
+def _create_header(metadata: Dict, generated_at: Optional[str] = None) -> Iterator[str]:
+    """Yield the markdown header lines with metadata."""
+    yield "# Transcript"
+    
+    # Add timestamp
+    yield f"**Generated**: {generated_at or datetime.now().strftime(_TIMESTAMP_FORMAT)}"
+    
+    # Add any additional metadata
+    for key, value in metadata.items():
+        yield f"**{key}**: {value}"
+
+def _format_content(content: str, speaker_mapping: Optional[Dict] = None) -> Iterator[str]:
+    """Yield the formatted lines of the main transcript content."""
+    started = False
+    
+    # Split into lines and process each
+    lines = content.splitlines()
+    
+    # No colon anywhere means no speaker lines; skip the turn tracking
+    if ':' not in content:
+        yield from (line for line in lines if line and not line.isspace())
+        return
+    
+    current_speaker = None
+    for line in lines:
+        if not line or line.isspace():
+            continue
             
-        Returns:
-            str: Formatted markdown text
-        """
-        if metadata:
-            self.metadata = metadata
+        # Try to detect speaker patterns (one scan, no list allocation)
+        speaker, sep, text = line.partition(':')
+        if sep:
+            speaker = speaker.strip()
+            text = text.strip()
             
-        # Build the formatted transcript
-        formatted_parts = []
-        
-        # Add header with metadata
-        formatted_parts.extend(self._create_header())
-        
-        # Format the main content
-        formatted_parts.extend(self._format_content(raw_text))
-        
-        # Join all parts with double newlines
-        return "\n\n".join(formatted_parts)
+            # Check if this is a new speaker
+            if speaker != current_speaker:
+                current_speaker = speaker
+                # Speaker name in bold, built once per turn; most
+                # transcripts have no mapping, so skip the lookup then
+                name = speaker_mapping.get(speaker, speaker) if speaker_mapping else speaker
+                prefix = f"**{name.translate(_MD_ESCAPE)}**: "
+                # Blank line before new speaker except at start, folded
+                # into the line rather than yielded as an empty item
+                if started:
+                    yield "\n\n" + prefix + text
+                    continue
+                    
+            yield prefix + text
+        else:
+            yield line
+        started = True
+
+class TranscriptFormatter:
+    """Handles formatting of transcript text into markdown format.
     
-    def _create_header(self) -> List[str]:
-        """Create the markdown header with metadata."""
-        header_parts = ["# Transcript"]
-        
-        # Add timestamp
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        header_parts.append(f"**Generated**: {timestamp}")
-        
-        # Add any additional metadata
-        for key, value in self.metadata.items():
-            header_parts.append(f"**{key}**: {value}")
-            
-        return header_parts
+    Holds no per-call state, so one instance can be shared between threads.
+    """
     
-    def _format_content(self, content: str) -> List[str]:
-        """Format the main transcript content."""
-        formatted_lines = []
-        
-        # Split into lines and process each
-        lines = content.strip().split('\n')
-        
-        current_speaker = None
-        for line in lines:
-            if not line.strip():
-                continue
-                
-            # Try to detect speaker patterns
-            if ':' in line:
-                speaker, text = line.split(':', 1)
-                speaker = speaker.strip()
-                text = text.strip()
-                
-                # Check if this is a new speaker
-                if speaker != current_speaker:
-                    current_speaker = speaker
-                    # Add extra line before new speaker except at start
-                    if formatted_lines:
-                        formatted_lines.append("")
-                        
-                # Format with speaker name in bold
-                if speaker in self.metadata.get("speaker_mapping", {}):
-                    mapped_name = self.metadata["speaker_mapping"][speaker]
-                    formatted_lines.append(f"**{mapped_name}**: {text}")
-                else:
-                    formatted_lines.append(f"**{speaker}**: {text}")
-            else:
-                formatted_lines.append(line)
-        
-        return formatted_lines
\ No newline at end of file
+    __slots__ = ()
+    
+    def format_transcript(self, 
+                         raw_text: str, 
+                         metadata: Optional[Dict] = None,
+                         generated_at: Optional[str] = None) -> str:
+        """Convert raw transcript text to formatted markdown; see format_transcript()."""
+        return format_transcript(raw_text, metadata, generated_at)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import os
+
+# macOS has no fdatasync; fsync gives the same durability there
+_datasync = getattr(os, 'fdatasync', os.fsync)
+
+def write_file(output_path: str, text: str) -> None:
+    """
+    Write text to a file and flush it to stable storage.
+    
+    Args:
+        output_path (str): Path of the file to (over)write
+        text (str): Content to write
+        
+    Raises:
+        OSError: If the file can't be written
+    """
+    data = text.encode('utf-8')
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        _datasync(fd)
+    finally:
+        os.close(fd)
@@ -6,39 +6,209 @@ import subprocess
 import tempfile
 import shutil
 import math
-from typing import List, Optional, Tuple
+import bisect
+import functools
+import hashlib
+import wave
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 from common.config import Config
 
+# Try to import NumPy for the in-process silence scan
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Try to import PyAV for in-process decoding and probing
+try:
+    import av
+except ImportError:
+    av = None
+
+# Resolved once to absolute paths: subprocess only takes its posix_spawn
+# fast path (with close_fds=False) for an executable with a directory part
+_FFMPEG = shutil.which('ffmpeg') or 'ffmpeg'
+_FFPROBE = shutil.which('ffprobe') or 'ffprobe'
+
+# silencedetect log line, e.g. "[silencedetect @ 0x..] silence_end: 4.000113 | silence_duration: 2"
+_SILENCE_END_RE = re.compile(rb'silence_end:\s*(\d+(?:\.\d+)?)')
+
+def _extract_chunk(input_path: str, start: str, end: str, output_path: str, threads: int) -> str:
+    """Extract a single chunk with ffmpeg (module-level so it can run in a worker process)."""
+    command = [
+        _FFMPEG,
+        '-threads', str(threads),
+        '-i', input_path,
+        '-ss', start,
+        '-to', end,
+        '-map', '0:a',
+        '-c', 'copy',
+        '-avoid_negative_ts', 'make_zero',
+        output_path,
+        '-y'
+    ]
+    
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        close_fds=False  # Our fds are non-inheritable anyway; allows posix_spawn (see _FFMPEG)
+    )
+    
+    stdout, stderr = process.communicate()
+    
+    if process.returncode != 0:
+        raise Exception(f"FFmpeg error: {stderr.decode()}")
+        
+    return output_path
+
+def _stride_points(start: float, stop: float, step: float) -> List[float]:
+    """
+    Return start+step, start+2*step, ... strictly before stop.
+    
+    Each point is computed by multiplication rather than repeated addition,
+    so long files don't accumulate floating-point drift.
+    """
+    count = math.ceil((stop - start) / step)
+    return [point for point in (start + step * k for k in range(1, count + 1)) if point < stop]
+
+def _av_duration(file_path: str) -> float:
+    """
+    Read a file's duration from its container metadata in-process with PyAV.
+    
+    Raises:
+        ValueError: If PyAV is unavailable or the container reports no duration
+    """
+    if av is None:
+        raise ValueError("PyAV not installed")
+        
+    try:
+        with av.open(file_path) as container:
+            if container.duration:
+                return container.duration / av.time_base
+            stream = container.streams.audio[0]
+            if stream.duration and stream.time_base:
+                return float(stream.duration * stream.time_base)
+            if stream.frames and stream.rate:
+                return stream.frames / stream.rate
+    except Exception as e:
+        raise ValueError(f"Unreadable container: {str(e)}")
+        
+    raise ValueError("Container reports no duration")
+
+def _wav_duration(file_path: str) -> float:
+    """
+    Read a WAV file's duration from its header, without spawning ffprobe.
+    
+    Raises:
+        ValueError: If the file isn't a WAV the stdlib reader understands
+    """
+    if Path(file_path).suffix.lower() != '.wav':
+        raise ValueError("Not a WAV file")
+        
+    try:
+        with wave.open(file_path, 'rb') as wav_file:
+            frames = wav_file.getnframes()
+            rate = wav_file.getframerate()
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"Unreadable WAV header: {str(e)}")
+        
+    if frames <= 0 or rate <= 0:
+        raise ValueError("Empty WAV file")
+    return frames / rate
+
+@functools.lru_cache(maxsize=256)
+def _probe_format(file_path: str, mtime_ns: int, size: int) -> Dict[str, float]:
+    """
+    Run ffprobe once for a file's container-level duration and bit rate.
+    
+    Cached on (path, mtime, size) so repeated lookups of an unchanged file
+    skip the subprocess; a rewritten file gets a fresh key.
+    """
+    command = [
+        _FFPROBE,
+        '-v', 'error',
+        '-print_format', 'json',
+        '-show_format',
+        file_path
+    ]
+    
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        close_fds=False
+    )
+    
+    stdout, stderr = process.communicate()
+    
+    if process.returncode != 0:
+        raise RuntimeError(f"FFprobe error: {stderr.decode()}")
+        
+    try:
+        fmt = json.loads(stdout.decode())['format']
+        duration = float(fmt['duration'])
+    except (ValueError, KeyError):
+        raise RuntimeError("Invalid audio file format")
+        
+    if duration <= 0:
+        raise RuntimeError("Invalid audio duration")
+        
+    try:
+        bit_rate = float(fmt.get('bit_rate', 0))
+    except ValueError:
+        bit_rate = 0.0
+    return {'duration': duration, 'bit_rate': bit_rate}
+
 class AudioChunker:
     """Handles splitting large audio files into processable chunks using ffmpeg."""
     
+    # Silence detection settings
+    SILENCE_THRESHOLD_DB = -30
+    SILENCE_SAMPLE_RATE = 8000  # Mono 8 kHz is plenty to find gaps in speech
+    SILENCE_FRAME_SECONDS = 0.01
+    
     def __init__(self, max_chunk_size_mb: float = Config.MAX_CHUNK_SIZE_MB, 
                  min_chunk_size_mb: float = Config.MIN_CHUNK_SIZE_MB,
-                 min_silence_duration: float = Config.MIN_SILENCE_DURATION):
+                 min_silence_duration: float = Config.MIN_SILENCE_DURATION,
+                 workers: Optional[int] = None,
+                 temp_root: Optional[str] = Config.TEMP_ROOT,
+                 cache_dir: Optional[str] = Config.CACHE_DIR):
         """Initialize the AudioChunker."""
         self.max_chunk_size_mb = max_chunk_size_mb
         self.min_chunk_size_mb = min_chunk_size_mb
         self.min_silence_duration = min_silence_duration
+        self.workers = workers or max(1, (os.cpu_count() or 1) // 2)
+        # Cap ffmpeg's own threading so parallel workers don't oversubscribe the CPU
+        self.ffmpeg_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self.temp_root = temp_root
+        self.silence_cache_dir = (os.path.join(os.path.expanduser(cache_dir), 'silence_points')
+                                  if cache_dir else None)
         self.temp_dir: Optional[str] = None
+        self._keep_temp_dir = False  # Set while used as a context manager
         self.bytes_per_second: Optional[float] = None
         
     def _estimate_chunk_size(self, duration: float, input_file: str) -> float:
-        """Estimate chunk size based on input file's bitrate."""
+        """
+        Estimate chunk size based on input file's bitrate.
+        
+        chunk_audio sets bytes_per_second up front and does this arithmetic
+        inline; this wrapper is for callers outside that flow.
+        """
         if not self.bytes_per_second:
-            total_size = os.path.getsize(input_file)
-            total_duration = self._get_audio_duration(input_file)
-            self.bytes_per_second = total_size / total_duration
+            self.bytes_per_second = self._probe_file(input_file)['bytes_per_second']
             
         return (duration * self.bytes_per_second) / (1024 * 1024)  # Convert to MB
         
     def _get_optimal_chunk_duration(self, input_file: str) -> float:
         """Calculate optimal chunk duration based on file's bitrate."""
         if not self.bytes_per_second:
-            total_size = os.path.getsize(input_file)
-            total_duration = self._get_audio_duration(input_file)
-            self.bytes_per_second = total_size / total_duration
+            self.bytes_per_second = self._probe_file(input_file)['bytes_per_second']
         
         target_size = self.max_chunk_size_mb * 0.8 * 1024 * 1024  # Target 80% of max
         return target_size / self.bytes_per_second
@@ -46,136 +216,395 @@ class AudioChunker:
     def needs_chunking(self, file_path: str) -> bool:
         """Check if a file needs to be split into chunks."""
         try:
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            file_size_mb = os.stat(file_path).st_size / (1024 * 1024)
             return file_size_mb > self.max_chunk_size_mb
         except OSError as e:
             logging.error(f"Error checking file size: {str(e)}")
             raise
             
-    def _create_temp_dir(self) -> str:
-        """Create a temporary directory for storing chunks."""
+    def _create_temp_dir(self, min_free_bytes: int = 0) -> str:
+        """
+        Create a temporary directory for storing chunks.
+        
+        Uses temp_root when it exists and has min_free_bytes available,
+        otherwise the system temp directory.
+        """
         if not self.temp_dir:
-            self.temp_dir = tempfile.mkdtemp(prefix=Config.TEMP_PREFIX)
+            self.temp_dir = tempfile.mkdtemp(prefix=Config.TEMP_PREFIX,
+                                             dir=self._usable_temp_root(min_free_bytes))
         return self.temp_dir
         
+    def _usable_temp_root(self, min_free_bytes: int) -> Optional[str]:
+        """Return temp_root if chunks fit there, or None for the system default."""
+        if not self.temp_root:
+            return None
+        try:
+            free = shutil.disk_usage(self.temp_root).free
+        except OSError as e:
+            logging.warning(f"Temp root {self.temp_root} unusable, using system temp dir: {str(e)}")
+            return None
+        if free < min_free_bytes:
+            logging.warning(f"Temp root {self.temp_root} has {free / (1024 * 1024):.0f} MB free, "
+                            f"using system temp dir")
+            return None
+        return self.temp_root
+        
     def _cleanup_temp_dir(self):
         """Remove temporary directory and its contents."""
         if self.temp_dir and os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir)
             self.temp_dir = None
             
+    def _remove_chunks(self, file_stem: str, ext: str):
+        """Remove any chunk files for the given input left in the temp directory."""
+        if not self.temp_dir or not os.path.exists(self.temp_dir):
+            return
+        prefix = f"{file_stem}_chunk_"
+        with os.scandir(self.temp_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.name.endswith(ext):
+                    os.remove(entry.path)
+                    
+    def _cleanup_after_error(self, file_path: str):
+        """
+        Clean up after a failed chunking run.
+        
+        Inside a context manager the temp directory is shared across calls, so
+        only this file's chunks are removed; otherwise the whole directory goes.
+        """
+        if self._keep_temp_dir:
+            self._remove_chunks(Path(file_path).stem, os.path.splitext(file_path)[1])
+        else:
+            self._cleanup_temp_dir()
+            
     def _detect_silence_points(self, file_path: str) -> List[float]:
+        """
+        Detect silence points in audio file.
+        
+        Decodes a downmixed low-rate PCM stream and scans frame RMS with NumPy,
+        in-process via PyAV when available, otherwise piped from ffmpeg.
+        Falls back to the ffmpeg silencedetect filter when NumPy is unavailable.
+        Results are kept under cache_dir, when set, so reruns skip the decode.
+        
+        Returns:
+            List[float]: Sorted times (seconds) at which each silence ends
+        """
+        cache_path = self._silence_cache_path(file_path)
+        if cache_path:
+            try:
+                with open(cache_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+                
+        silence_points = self._scan_silence_points(file_path)
+        
+        if cache_path:
+            try:
+                os.makedirs(self.silence_cache_dir, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(silence_points, f)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                logging.debug(f"Could not cache silence points: {str(e)}")
+                
+        return silence_points
+        
+    def _silence_cache_path(self, file_path: str) -> Optional[str]:
+        """
+        Path of the cached silence points for a file, or None when caching is off.
+        
+        Keyed on the file's size and its first and last 64 KB, plus the
+        detection settings, so the key is cheap to compute even for long recordings.
+        """
+        if not self.silence_cache_dir:
+            return None
+            
+        block = 64 * 1024
+        try:
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                digest = hashlib.blake2b(f.read(block), digest_size=20)
+                if size > block:
+                    f.seek(max(block, size - block))
+                    digest.update(f.read(block))
+        except OSError:
+            return None
+            
+        settings = (size, self.SILENCE_THRESHOLD_DB, self.SILENCE_SAMPLE_RATE,
+                    self.SILENCE_FRAME_SECONDS, self.min_silence_duration, np is None)
+        digest.update(repr(settings).encode())
+        return os.path.join(self.silence_cache_dir, f"{digest.hexdigest()}.json")
+        
+    def _scan_silence_points(self, file_path: str) -> List[float]:
+        """Run silence detection on a file, without consulting the cache."""
+        if np is None:
+            return self._detect_silence_points_ffmpeg(file_path)
+            
+        try:
+            samples = None
+            if av is not None:
+                try:
+                    samples = self._decode_pcm_av(file_path)
+                except Exception as e:
+                    logging.debug(f"PyAV decode failed, using ffmpeg: {str(e)}")
+                    
+            if samples is None:
+                samples = self._decode_pcm_ffmpeg(file_path)
+                
+            return self._find_silence_ends(samples)
+            
+        except Exception as e:
+            logging.error(f"Error detecting silence points: {str(e)}")
+            raise
+            
+    def _decode_pcm_av(self, file_path: str) -> "np.ndarray":
+        """Decode the first audio stream to mono PCM at SILENCE_SAMPLE_RATE in-process with PyAV."""
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=self.SILENCE_SAMPLE_RATE)
+        blocks = []
+        with av.open(file_path) as container:
+            stream = container.streams.audio[0]
+            stream.thread_count = self.ffmpeg_threads
+            for frame in container.decode(stream):
+                for out in resampler.resample(frame):
+                    blocks.append(out.to_ndarray().reshape(-1))
+            for out in resampler.resample(None):
+                blocks.append(out.to_ndarray().reshape(-1))
+                
+        if not blocks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(blocks).astype(np.float32)
+        
+    def _decode_pcm_ffmpeg(self, file_path: str) -> "np.ndarray":
+        """Decode the first audio stream to mono PCM at SILENCE_SAMPLE_RATE through an ffmpeg pipe."""
+        command = [
+            _FFMPEG,
+            '-nostdin',
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-filter_threads', str(self.ffmpeg_threads),
+            '-i', file_path,
+            '-vn', '-sn',
+            '-map', '0:a:0',
+            '-threads', str(self.ffmpeg_threads),
+            '-ac', '1',
+            '-ar', str(self.SILENCE_SAMPLE_RATE),
+            '-f', 's16le',
+            '-'
+        ]
+        
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            close_fds=False
+        )
+        
+        pcm, stderr = process.communicate()
+        
+        if process.returncode != 0:
+            raise Exception(f"FFmpeg error: {stderr.decode()}")
+            
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        
+    def _find_silence_ends(self, samples: "np.ndarray") -> List[float]:
+        """Find where each silent run of at least min_silence_duration ends in mono PCM samples."""
+        rate = self.SILENCE_SAMPLE_RATE
+        
+        # RMS per short frame
+        frame = max(1, int(rate * self.SILENCE_FRAME_SECONDS))
+        n_frames = samples.size // frame
+        if n_frames == 0:
+            return []
+        frames = samples[:n_frames * frame].reshape(n_frames, frame)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        
+        # Same -30 dBFS threshold silencedetect uses
+        threshold = 32768.0 * 10 ** (self.SILENCE_THRESHOLD_DB / 20)
+        quiet = (rms < threshold).astype(np.int8)
+        
+        # Run-length encode the quiet mask into [start, end) frame ranges
+        edges = np.diff(np.concatenate(([0], quiet, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        
+        # Keep runs long enough to count as silence that end before EOF
+        min_frames = math.ceil(self.min_silence_duration / self.SILENCE_FRAME_SECONDS)
+        keep = ((ends - starts) >= min_frames) & (ends < n_frames)
+        
+        return (ends[keep] * frame / rate).tolist()
+        
+    def _detect_silence_points_ffmpeg(self, file_path: str) -> List[float]:
         """Detect silence points in audio file using ffmpeg silencedetect filter."""
         try:
             command = [
-                'ffmpeg',
+                _FFMPEG,
+                '-nostdin',
+                '-hide_banner',
+                '-loglevel', 'info',
+                '-nostats',
+                '-filter_threads', str(self.ffmpeg_threads),
                 '-i', file_path,
-                '-af', f'silencedetect=noise=-30dB:d={self.min_silence_duration}',
+                '-vn', '-sn',
+                '-map', '0:a:0',
+                '-threads', str(self.ffmpeg_threads),
+                # Downmix and resample ahead of the detector; it only needs levels
+                '-af', (f'aresample={self.SILENCE_SAMPLE_RATE},aformat=channel_layouts=mono,'
+                        f'silencedetect=noise={self.SILENCE_THRESHOLD_DB}dB:d={self.min_silence_duration}'),
                 '-f', 'null',
                 '-'
             ]
             
             process = subprocess.Popen(
                 command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                close_fds=False
             )
             
-            _, stderr = process.communicate()
-            stderr_output = stderr.decode()
-            
+            # Match silence markers on the raw bytes as ffmpeg emits them
             silence_points = []
-            for line in stderr_output.split('\n'):
-                if 'silence_end' in line:
-                    try:
-                        time_str = line.split('silence_end: ')[1].split(' ')[0]
-                        silence_points.append(float(time_str))
-                    except (IndexError, ValueError):
-                        continue
-                        
+            for line in process.stderr:
+                match = _SILENCE_END_RE.search(line)
+                if match:
+                    silence_points.append(float(match.group(1)))
+            process.wait()
+            
             return sorted(silence_points)
             
         except Exception as e:
             logging.error(f"Error detecting silence points: {str(e)}")
             raise
             
-    def _split_at_points(self, input_path: str, split_points: List[float]) -> List[str]:
-        """Split audio file at specified points using ffmpeg."""
-        chunk_paths = []
+    def _split_at_points(self, input_path: str, split_points: List[float],
+                         duration: Optional[float] = None) -> List[str]:
+        """
+        Split audio file at specified points using ffmpeg.
+        
+        Writes every chunk in a single pass with the segment muxer, falling
+        back to parallel per-chunk extraction if segmenting fails.
+        """
         logging.debug(f"\n=== Starting file split at {len(split_points)} points ===")
-        temp_dir = self._create_temp_dir()
+        # Chunks are stream copies, so allow for about twice the input's size
+        temp_dir = self._create_temp_dir(2 * os.stat(input_path).st_size)
         file_stem = Path(input_path).stem
+        ext = os.path.splitext(input_path)[1]
         
         try:
-            duration = self._get_audio_duration(input_path)
-            points = [0] + split_points + [duration]
+            # The temp dir may be reused across calls; don't pick up stale chunks
+            self._remove_chunks(file_stem, ext)
             
-            for i in range(len(points) - 1):
-                start = points[i]
-                end = points[i + 1]
-                
-                ext = os.path.splitext(input_path)[1]
-                output_path = os.path.join(temp_dir, f"{file_stem}_chunk_{i:03d}{ext}")
-                
-                command = [
-                    'ffmpeg',
-                    '-i', input_path,
-                    '-ss', str(start),
-                    '-to', str(end),
-                    '-c', 'copy',
-                    output_path,
-                    '-y'
-                ]
-                
-                process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
-                
-                stdout, stderr = process.communicate()
-                
-                if process.returncode != 0:
-                    raise Exception(f"FFmpeg error: {stderr.decode()}")
+            if split_points:
+                try:
+                    return self._segment_at_points(input_path, split_points, temp_dir, file_stem, ext)
+                except Exception as e:
+                    logging.debug(f"Segment muxer failed, extracting chunks individually: {str(e)}")
                     
-                chunk_paths.append(output_path)
-                
-            return chunk_paths
+            return self._extract_at_points(input_path, split_points, temp_dir, file_stem, ext, duration)
             
         except Exception as e:
-            self._cleanup_temp_dir()
+            self._cleanup_after_error(input_path)
             logging.error(f"Error splitting audio: {str(e)}")
             raise
             
-    def _get_audio_duration(self, file_path: str) -> float:
-        """Get duration of audio file in seconds using ffprobe."""
-        try:
-            command = [
-                'ffprobe',
-                '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                file_path
-            ]
+    def _segment_at_points(self, input_path: str, split_points: List[float],
+                           temp_dir: str, file_stem: str, ext: str) -> List[str]:
+        """Write all chunks in one ffmpeg pass using the segment muxer."""
+        output_pattern = os.path.join(temp_dir, f"{file_stem}_chunk_%03d{ext}")
+        
+        command = [
+            _FFMPEG,
+            '-i', input_path,
+            '-map', '0:a',
+            '-c', 'copy',
+            '-f', 'segment',
+            '-segment_times', ','.join(f"{point:.3f}" for point in split_points),
+            '-reset_timestamps', '1',
+            output_pattern,
+            '-y'
+        ]
+        
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            close_fds=False
+        )
+        
+        stdout, stderr = process.communicate()
+        
+        if process.returncode != 0:
+            raise Exception(f"FFmpeg error: {stderr.decode()}")
             
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
+        prefix = f"{file_stem}_chunk_"
+        with os.scandir(temp_dir) as entries:
+            chunk_paths = sorted(entry.path for entry in entries
+                                 if entry.name.startswith(prefix) and entry.name.endswith(ext))
+        if not chunk_paths:
+            raise Exception("Segment muxer produced no chunks")
+        return chunk_paths
+        
+    def _extract_at_points(self, input_path: str, split_points: List[float],
+                           temp_dir: str, file_stem: str, ext: str,
+                           duration: Optional[float] = None) -> List[str]:
+        """Extract each chunk with its own ffmpeg process, in parallel."""
+        if duration is None:
+            duration = self._get_audio_duration(input_path)
+        points = [0] + split_points + [duration]
+        
+        # Fixed millisecond timestamps, formatted once (same as the segment muxer gets)
+        timestamps = [f"{point:.3f}" for point in points]
+        threads = self.ffmpeg_threads
+        
+        jobs = []
+        for i in range(len(points) - 1):
+            output_path = os.path.join(temp_dir, f"{file_stem}_chunk_{i:03d}{ext}")
+            jobs.append((input_path, timestamps[i], timestamps[i + 1], output_path, threads))
+        
+        # Each extraction is independent; map() preserves chunk order
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(_extract_chunk, *zip(*jobs)))
             
-            stdout, stderr = process.communicate()
+    def _probe_file(self, file_path: str, st: Optional[os.stat_result] = None) -> Dict[str, float]:
+        """
+        Gather everything chunk planning needs about a file in one probe.
+        
+        Args:
+            file_path: Path to the audio file
+            st: Existing os.stat result for the file, to avoid another stat call
             
-            if process.returncode != 0:
-                raise RuntimeError(f"FFprobe error: {stderr.decode()}")
+        Returns:
+            Dict with 'duration' (s), 'size' (bytes), 'bytes_per_second' and 'bit_rate' (bits/s)
+        """
+        size = (st or os.stat(file_path)).st_size
+        duration = self._get_audio_duration(file_path)
+        bytes_per_second = size / duration
+        return {
+            'duration': duration,
+            'size': size,
+            'bytes_per_second': bytes_per_second,
+            'bit_rate': bytes_per_second * 8
+        }
+        
+    def _get_audio_duration(self, file_path: str) -> float:
+        """
+        Get duration of audio file in seconds.
+        
+        WAV headers are read directly and other containers through PyAV when
+        installed; anything else goes through ffprobe, memoized per file version.
+        """
+        try:
+            for fast_duration in (_wav_duration, _av_duration):
+                try:
+                    duration = fast_duration(file_path)
+                    if duration > 0:
+                        return duration
+                except ValueError:
+                    pass
                 
-            try:
-                duration = float(stdout.decode().strip())
-                if duration <= 0:
-                    raise RuntimeError("Invalid audio duration")
-                return duration
-            except ValueError:
-                raise RuntimeError("Invalid audio file format")
+            st = os.stat(file_path)
+            return _probe_format(file_path, st.st_mtime_ns, st.st_size)['duration']
             
         except Exception as e:
             logging.error(f"Error getting audio duration: {str(e)}")
@@ -187,23 +616,26 @@ class AudioChunker:
             logging.debug(f"\n=== Starting chunk_audio for {file_path} ===")
             
             # Validate file exists and is readable
-            if not os.path.exists(file_path):
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
                 raise RuntimeError(f"File not found: {file_path}")
                 
-            # Verify it's a valid audio file by checking duration
+            # Verify it's a valid audio file and gather size/duration/bitrate in one probe
             try:
-                self._get_audio_duration(file_path)
+                probe = self._probe_file(file_path, st)
             except Exception as e:
                 raise RuntimeError(f"Invalid audio file: {str(e)}")
                 
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            duration = probe['duration']
+            self.bytes_per_second = probe['bytes_per_second']
+            file_size_mb = probe['size'] / (1024 * 1024)
             logging.debug(f"Input file size: {file_size_mb:.2f} MB")
             
-            if not self.needs_chunking(file_path):
+            if file_size_mb <= self.max_chunk_size_mb:
                 logging.debug("File doesn't need chunking")
                 return [file_path], False
                 
-            duration = self._get_audio_duration(file_path)
             mb_per_second = file_size_mb / duration
             logging.debug(f"File duration: {duration:.2f}s, MB/second: {mb_per_second:.4f}")
             
@@ -222,87 +654,82 @@ class AudioChunker:
                 ))
                 logging.debug(f"Created {len(silence_points)} regular intervals: {silence_points}")
             else:
-                total_duration = self._get_audio_duration(file_path)
+                total_duration = duration
                 bytes_per_second = self.bytes_per_second
                 target_size = (self.min_chunk_size_mb + self.max_chunk_size_mb) / 2
                 target_duration = (target_size * 1024 * 1024) / bytes_per_second
                 
-                target_points = []
-                current_time = target_duration
-                while current_time < total_duration:
-                    target_points.append(current_time)
-                    current_time += target_duration
+                target_points = _stride_points(0, total_duration, target_duration)
+                
+                # Allowed chunk lengths in seconds, from the size limits
+                min_span = (self.min_chunk_size_mb * 1024 * 1024) / bytes_per_second
+                max_span = (self.max_chunk_size_mb * 1024 * 1024) / bytes_per_second
+                
+                # Sorted, unique, and only points that could ever start a valid chunk
+                silence_points = sorted(set(
+                    point for point in silence_points
+                    if min_span <= point < total_duration
+                ))
                 
                 filtered_points = []
                 last_point = 0
                 
                 for target in target_points:
-                    closest_point = None
-                    min_distance = float('inf')
+                    # Silence points giving a valid chunk from last_point form a sorted window
+                    lo = max(bisect.bisect_right(silence_points, last_point),
+                             bisect.bisect_left(silence_points, last_point + min_span))
+                    hi = bisect.bisect_right(silence_points, last_point + max_span)
                     
-                    for point in silence_points:
-                        if point > last_point:
-                            distance = abs(point - target)
-                            chunk_size = self._estimate_chunk_size(point - last_point, file_path)
-                            
-                            if (chunk_size >= self.min_chunk_size_mb and 
-                                chunk_size <= self.max_chunk_size_mb and 
-                                distance < min_distance):
-                                closest_point = point
-                                min_distance = distance
+                    closest_point = None
+                    if lo < hi:
+                        # Nearest to target is one of the two points straddling it
+                        idx = bisect.bisect_left(silence_points, target, lo, hi)
+                        candidates = silence_points[max(lo, idx - 1):min(hi, idx + 1)]
+                        closest_point = min(candidates, key=lambda point: abs(point - target))
                     
-                    if closest_point is None:
-                        chunk_size = self._estimate_chunk_size(target - last_point, file_path)
-                        if chunk_size >= self.min_chunk_size_mb and chunk_size <= self.max_chunk_size_mb:
-                            closest_point = target
+                    if closest_point is None and min_span <= target - last_point <= max_span:
+                        closest_point = target
                     
                     if closest_point is not None:
                         filtered_points.append(closest_point)
                         last_point = closest_point
                 
                 final_duration = total_duration - (filtered_points[-1] if filtered_points else 0)
-                final_size = self._estimate_chunk_size(final_duration, file_path)
+                final_size = (final_duration * bytes_per_second) / (1024 * 1024)
                 
                 if final_size > self.max_chunk_size_mb:
-                    remaining_duration = final_duration
                     last_split = filtered_points[-1] if filtered_points else 0
-                    
-                    while remaining_duration > 0:
-                        next_duration = min(target_duration, remaining_duration)
-                        next_split = last_split + next_duration
-                        
-                        if next_split < total_duration:
-                            filtered_points.append(next_split)
-                        
-                        remaining_duration -= next_duration
-                        last_split = next_split
+                    filtered_points.extend(_stride_points(last_split, total_duration, target_duration))
                 
                 silence_points = filtered_points
                 logging.debug(f"Filtered to {len(silence_points)} optimal points: {silence_points}")
             
             # Split the file
-            chunk_paths = self._split_at_points(file_path, silence_points)
-            
-            # Log chunk sizes
-            total_size = 0
-            for i, chunk_path in enumerate(chunk_paths):
-                chunk_size_mb = os.path.getsize(chunk_path) / (1024 * 1024)
-                chunk_duration = self._get_audio_duration(chunk_path)
-                total_size += chunk_size_mb
-                logging.debug(f"Chunk {i}: {chunk_size_mb:.2f} MB, Duration: {chunk_duration:.2f}s")
+            chunk_paths = self._split_at_points(file_path, silence_points, duration)
             
-            logging.debug(f"Total size of chunks: {total_size:.2f} MB (Original: {file_size_mb:.2f} MB)")
+            # Log chunk sizes (probes every chunk, so only when debugging)
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                total_size = 0
+                for i, chunk_path in enumerate(chunk_paths):
+                    chunk_size_mb = os.stat(chunk_path).st_size / (1024 * 1024)
+                    chunk_duration = self._get_audio_duration(chunk_path)
+                    total_size += chunk_size_mb
+                    logging.debug(f"Chunk {i}: {chunk_size_mb:.2f} MB, Duration: {chunk_duration:.2f}s")
+                
+                logging.debug(f"Total size of chunks: {total_size:.2f} MB (Original: {file_size_mb:.2f} MB)")
             
             return chunk_paths, True
             
         except Exception as e:
-            self._cleanup_temp_dir()
+            self._cleanup_after_error(file_path)
             logging.error(f"Error chunking audio file: {str(e)}")
             raise
             
     def __enter__(self):
-        """Context manager entry."""
-        self._create_temp_dir()  # Ensure temp directory exists on entry
+        """Context manager entry; the temp directory persists across calls until exit."""
+        # The temp directory is created by the first split, once the input
+        # size is known, so temp_root's free-space check still applies
+        self._keep_temp_dir = True
         return self
         
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -313,4 +740,5 @@ class AudioChunker:
             logging.error(f"Error cleaning up temp directory: {str(e)}")
         finally:
             # Ensure temp_dir is always reset
-            self.temp_dir = None
\ No newline at end of file
+            self.temp_dir = None
+            self._keep_temp_dir = False
\ No newline at end of file
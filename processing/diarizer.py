@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 
 import re
+import heapq
 from typing import Dict, List, Tuple, Optional
 import logging
 from dataclasses import dataclass
 from datetime import datetime
 
+# Lead-ins stripped from introduced names
+_NAME_PREFIX_RE = re.compile(r'^(this is|here|i\'m)\s+')
+
 @dataclass
 class SpeakerSegment:
     """Represents a segment of speech by a speaker."""
@@ -15,6 +19,43 @@ class SpeakerSegment:
     text: str
     mapped_name: Optional[str] = None
 
+class SpeakerAwareCache:
+    """
+    Keeps the most representative past segments per speaker across chunks.
+    
+    Each segment is scored by its duration, weighted toward later chunks:
+    phi = (end_time - start_time) * (1 + alpha * chunk_idx / total_chunks).
+    Every speaker holds a bounded min-heap of its best-scoring segments.
+    """
+    
+    def __init__(self, total_chunks: int, alpha: float = 0.5, max_per_speaker: int = 4):
+        self.total_chunks = max(1, total_chunks)
+        self.alpha = alpha
+        self.max_per_speaker = max_per_speaker
+        self._heaps: Dict[str, List[Tuple[float, int, SpeakerSegment]]] = {}
+        self._counter = 0  # Tie-breaker so segments themselves are never compared
+        
+    def add_observation(self, chunk_idx: int, segments: List[SpeakerSegment]) -> None:
+        """Score and store the segments identified in one chunk."""
+        weight = 1 + self.alpha * (chunk_idx / self.total_chunks)
+        for segment in segments:
+            speaker = segment.mapped_name or segment.speaker_id
+            entry = ((segment.end_time - segment.start_time) * weight, self._counter, segment)
+            self._counter += 1
+            
+            heap = self._heaps.setdefault(speaker, [])
+            if len(heap) < self.max_per_speaker:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heappushpop(heap, entry)
+                
+    def select(self, k: int = 2) -> Dict[str, List[SpeakerSegment]]:
+        """Return up to k highest-scoring segments for every speaker seen so far."""
+        return {
+            speaker: [entry[2] for entry in heapq.nlargest(k, heap)]
+            for speaker, heap in self._heaps.items()
+        }
+
 class SpeakerDiarizer:
     """Handles speaker identification and diarization from transcript text."""
     
@@ -25,11 +66,17 @@ class SpeakerDiarizer:
             "stewart alsop iii": "Stewart Alsop",
             "host": "Stewart Alsop"
         }
+        # Compiled once; they run against every transcript line
         self.speaker_patterns = [
-            r'^([A-Za-z\s]+):\s*(.+)$',  # Standard format: "Name: text"
-            r'^Speaker\s+(\d+):\s*(.+)$',  # Numbered format: "Speaker 1: text"
-            r'(?:Hi|Hello|Hey),?\s+(?:I\'m|this is)\s+([A-Za-z\s]+?)(?:,|\.|$|\s+and)',  # Introductions
-            r'(?:Hi|Hello|Hey),?\s+([A-Za-z\s]+?)\s+here(?:\.|\s|$)'  # "Name here" format
+            re.compile(r'^([A-Za-z\s]+):\s*(.+)$'),  # Standard format: "Name: text"
+            re.compile(r'^Speaker\s+(\d+):\s*(.+)$')  # Numbered format: "Speaker 1: text"
+        ]
+        # Introduction forms, scanned separately: a line like "Hey, this is
+        # Bob here" matches both, and one alternation would drop the overlap
+        intro_flags = re.MULTILINE | re.IGNORECASE
+        self.intro_patterns = [
+            re.compile(r'(?:Hi|Hello|Hey),?\s+(?:I\'m|this is)\s+([A-Za-z\s]+?)(?:,|\.|$|\s+and)', intro_flags),  # Introductions
+            re.compile(r'(?:Hi|Hello|Hey),?\s+([A-Za-z\s]+?)\s+here(?:\.|\s|$)', intro_flags)  # "Name here" format
         ]
     
     def process_transcript(self, transcript_text: str) -> Tuple[List[SpeakerSegment], Dict[str, str]]:
@@ -46,14 +93,13 @@ class SpeakerDiarizer:
         """
         # Initialize tracking
         segments: List[SpeakerSegment] = []
-        speaker_mapping: Dict[str, str] = {}
         current_time = 0.0
         
-        # First pass: Find introductions and explicit speaker names
+        # Introductions are found across the whole text, since one can wrap
+        # onto the next line
         intro_names = self._find_introductions(transcript_text)
-        speaker_mapping.update(self._normalize_speaker_names(intro_names))
         
-        # Process each line of the transcript
+        # Collect labelled segments line by line
         lines = transcript_text.strip().split('\n')
         for line in lines:
             line = line.strip()
@@ -67,21 +113,25 @@ class SpeakerDiarizer:
                 words = len(text.split())
                 segment_duration = words * 0.3  # Rough estimate: 0.3 seconds per word
                 
-                segment = SpeakerSegment(
+                segments.append(SpeakerSegment(
                     speaker_id=speaker_id,
                     start_time=current_time,
                     end_time=current_time + segment_duration,
-                    text=text,
-                    mapped_name=speaker_mapping.get(speaker_id.lower())
-                )
-                segments.append(segment)
+                    text=text
+                ))
                 current_time += segment_duration
-                
-                # Update speaker mapping if not already known
-                if speaker_id.lower() not in speaker_mapping:
-                    normalized_name = self._normalize_speaker_name(speaker_id)
-                    if normalized_name:
-                        speaker_mapping[speaker_id.lower()] = normalized_name
+        
+        # Introductions take precedence over speaker labels
+        speaker_mapping: Dict[str, str] = self._normalize_speaker_names(intro_names)
+        for segment in segments:
+            speaker_key = segment.speaker_id.lower()
+            segment.mapped_name = speaker_mapping.get(speaker_key)
+            
+            # Update speaker mapping if not already known
+            if speaker_key not in speaker_mapping:
+                normalized_name = self._normalize_speaker_name(segment.speaker_id)
+                if normalized_name:
+                    speaker_mapping[speaker_key] = normalized_name
         
         # If we haven't identified the host, add Stewart as the first speaker
         if not any(name == "Stewart Alsop" for name in speaker_mapping.values()):
@@ -94,9 +144,8 @@ class SpeakerDiarizer:
     def _find_introductions(self, text: str) -> List[str]:
         """Find speaker names from introduction patterns."""
         names = []
-        for pattern in self.speaker_patterns[2:]:  # Use only introduction patterns
-            matches = re.finditer(pattern, text, re.MULTILINE | re.IGNORECASE)
-            for match in matches:
+        for pattern in self.intro_patterns:
+            for match in pattern.finditer(text):
                 name = match.group(1).strip()
                 if name.lower() not in ['i', 'me', 'everyone', 'everybody']:
                     # Convert to lowercase for consistent mapping
@@ -109,12 +158,12 @@ class SpeakerDiarizer:
         Returns tuple of (speaker_id, text) or (None, original_line).
         """
         # Try each pattern
-        for pattern in self.speaker_patterns[:2]:  # Use only speaker label patterns
-            match = re.match(pattern, line)
+        for pattern in self.speaker_patterns:
+            match = pattern.match(line)
             if match:
                 # For numbered speakers, keep the "Speaker" prefix
                 speaker_id = match.group(1).strip()
-                if re.match(r'^\d+$', speaker_id):
+                if speaker_id.isdigit():
                     speaker_id = f"Speaker {speaker_id}"
                 return speaker_id, match.group(2).strip()
         
@@ -145,7 +194,7 @@ class SpeakerDiarizer:
         name = name.lower().strip()
         
         # Remove common prefixes
-        name = re.sub(r'^(this is|here|i\'m)\s+', '', name)
+        name = _NAME_PREFIX_RE.sub('', name)
         
         # Check known speakers
         if name in self.known_speakers:
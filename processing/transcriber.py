@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
 import logging
+import os
+import threading
+import time
+import uuid
+import wave
 import importlib.util
 from processing.chunker import AudioChunker
+from processing.diarizer import SpeakerAwareCache, SpeakerDiarizer, SpeakerSegment
+from common import services
 from common.config import Config
 
 # Try to import Google Cloud Speech
@@ -13,6 +22,12 @@ try:
 except ImportError:
     speech = None
 
+# Try to import Google Cloud Storage for staging long Cloud Speech audio
+try:
+    from google.cloud import storage
+except ImportError:
+    storage = None
+
 # Try to import Google Generative AI
 try:
     import google.generativeai as genai
@@ -38,68 +53,153 @@ class TranscriptionService(ABC):
 class CloudSpeechTranscriber(TranscriptionService):
     """Google Cloud Speech-to-Text transcription service."""
     
-    def __init__(self):
+    # Synchronous recognize only accepts about a minute of audio
+    SYNC_LIMIT_SECONDS = 60
+    # Audio sent inline in a request is capped at about 10 MB (~5 min at 16 kHz mono)
+    INLINE_LIMIT_BYTES = 10 * 1024 * 1024
+    LONG_RUNNING_TIMEOUT = 3600
+    
+    def __init__(self, bucket: Optional[str] = Config.SPEECH_BUCKET):
+        """
+        Initialize the Cloud Speech transcriber.
+        
+        Args:
+            bucket: Cloud Storage bucket for staging audio longer than a
+                minute; without one, audio must fit inline in the request
+        """
         if speech is None:
             raise ImportError("google-cloud-speech package is required for CloudSpeechTranscriber")
         self.client = speech.SpeechClient()
+        self.bucket = None
+        if bucket:
+            if storage is None:
+                raise ImportError("google-cloud-storage package is required when SPEECH_BUCKET is set")
+            self.bucket = storage.Client().bucket(bucket)
         
     def transcribe_audio(self, wav_path: str) -> str:
-        """Transcribe audio using Google Cloud Speech-to-Text."""
+        """
+        Transcribe audio using Google Cloud Speech-to-Text.
+        
+        Clips up to a minute go through synchronous recognize; longer audio
+        uses long_running_recognize. With a bucket configured, longer audio
+        is streamed from disk to Cloud Storage and the API reads it from
+        there; a gs:// URI is passed straight through. Otherwise the audio
+        is sent inline, which the API caps at INLINE_LIMIT_BYTES.
+        
+        Raises:
+            ValueError: If the audio is too large to send inline and no bucket is configured
+        """
+        blob = None
         try:
-            # Read the audio file
-            with open(wav_path, 'rb') as audio_file:
-                content = audio_file.read()
+            if wav_path.startswith('gs://'):
+                audio = speech.RecognitionAudio(uri=wav_path)
+                sample_rate, long_running = Config.AUDIO_SAMPLE_RATE, True
+            else:
+                sample_rate, duration = self._wav_info(wav_path)
+                long_running = duration is not None and duration > self.SYNC_LIMIT_SECONDS
+                if long_running and self.bucket is not None:
+                    blob = self._stage_in_bucket(wav_path)
+                    audio = speech.RecognitionAudio(uri=f"gs://{blob.bucket.name}/{blob.name}")
+                else:
+                    # Read at most one byte past the limit, so oversized audio
+                    # is rejected without loading all of it
+                    with open(wav_path, 'rb') as audio_file:
+                        content = audio_file.read(self.INLINE_LIMIT_BYTES + 1)
+                    if len(content) > self.INLINE_LIMIT_BYTES:
+                        raise ValueError(
+                            f"{wav_path} is over the {self.INLINE_LIMIT_BYTES // (1024 * 1024)} MB "
+                            f"inline audio limit; set SPEECH_BUCKET to transcribe it via Cloud Storage")
+                    audio = speech.RecognitionAudio(content=content)
             
-            audio = speech.RecognitionAudio(content=content)
             config = speech.RecognitionConfig(
                 encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=44100,
+                sample_rate_hertz=sample_rate,
                 language_code="en-US",
                 enable_speaker_diarization=True,
                 diarization_speaker_count=2  # Assumes 2 speakers for meeting
             )
             
             # Perform the transcription
-            response = self.client.recognize(config=config, audio=audio)
+            if long_running:
+                operation = self.client.long_running_recognize(config=config, audio=audio)
+                response = operation.result(timeout=self.LONG_RUNNING_TIMEOUT)
+            else:
+                response = self.client.recognize(config=config, audio=audio)
             
-            # Process speaker diarization
-            transcript = []
+            # Group consecutive words by speaker; joined once at the end
+            turns: List[Tuple[int, List[str]]] = []
             for result in response.results:
                 alternative = result.alternatives[0]
                 
                 # Extract speaker tags
                 for word in alternative.words:
                     speaker_tag = word.speaker_tag
-                    speaker = f"Speaker {speaker_tag}"
-                    content = word.word
                     
-                    # Start new line for new speaker
-                    if not transcript or not transcript[-1].startswith(f"{speaker}:"):
-                        transcript.append(f"{speaker}: {content}")
+                    # Start new turn for new speaker
+                    if not turns or turns[-1][0] != speaker_tag:
+                        turns.append((speaker_tag, [word.word]))
                     else:
-                        transcript[-1] += f" {content}"
+                        turns[-1][1].append(word.word)
             
-            return "\n".join(transcript)
+            return "\n".join(f"Speaker {speaker_tag}: {' '.join(words)}" for speaker_tag, words in turns)
             
         except Exception as e:
             logging.error(f"Cloud Speech transcription error: {str(e)}")
             raise
+        finally:
+            if blob is not None:
+                try:
+                    blob.delete()
+                except Exception as e:
+                    logging.warning(f"Could not delete staged audio {blob.name}: {str(e)}")
+
+    def _stage_in_bucket(self, wav_path: str) -> Any:
+        """Upload a local file to the staging bucket under a unique name and return its blob."""
+        blob = self.bucket.blob(f"speech/{uuid.uuid4().hex}/{os.path.basename(wav_path)}")
+        # Streamed from the file in chunks rather than read into memory
+        blob.upload_from_filename(wav_path, content_type='audio/wav')
+        return blob
+
+    @staticmethod
+    def _wav_info(wav_path: str) -> Tuple[int, Optional[float]]:
+        """
+        Read the sample rate and duration from the WAV header.
+        
+        Returns:
+            Tuple of sample rate (the configured rate if unreadable) and
+            duration in seconds (None if unreadable)
+        """
+        try:
+            with wave.open(wav_path, 'rb') as wav_file:
+                rate = wav_file.getframerate()
+                return rate, wav_file.getnframes() / rate
+        except (wave.Error, EOFError, OSError, ZeroDivisionError):
+            return Config.AUDIO_SAMPLE_RATE, None
 
 class GeminiTranscriber(TranscriptionService):
     """Google Gemini Pro transcription service with automatic chunking."""
     
-    def __init__(self, max_chunk_size_mb: float = 15.0):
+    # Uploaded files expire after 48h; reuse handles for a little less than that
+    UPLOAD_TTL_SECONDS = 47 * 3600
+    HASH_BLOCK_SIZE = 4 * 1024 * 1024
+    
+    def __init__(self, max_chunk_size_mb: float = Config.MAX_CHUNK_SIZE_MB, max_workers: int = 4):
         """
         Initialize the Gemini transcriber.
         
         Args:
             max_chunk_size_mb: Maximum chunk size in megabytes
+            max_workers: Number of chunk uploads/transcriptions allowed in flight at once
         """
         if genai is None:
             raise ImportError("google-generativeai package is required for GeminiTranscriber")
-        genai.configure(api_key=Config.get_google_api_key())
+        # Shared with the analysis model, so the client is configured only once
+        services.configure_genai()
         self.model = genai.GenerativeModel('gemini-1.5-pro')
         self.max_chunk_size_mb = max_chunk_size_mb
+        self.max_workers = max_workers
+        self._upload_cache: Dict[str, Tuple[float, Any]] = {}
+        self._upload_lock = threading.Lock()
         
     def transcribe_audio(self, wav_path: str) -> str:
         """
@@ -113,18 +213,39 @@ class GeminiTranscriber(TranscriptionService):
                 
                 if was_chunked:
                     logging.info(f"File split into {len(chunk_paths)} chunks for processing")
+                    total = len(chunk_paths)
+                    diarizer = SpeakerDiarizer()
+                    speaker_cache = SpeakerAwareCache(total)
                     transcriptions = []
-                    speaker_context = None
                     
-                    # Process each chunk
-                    for i, chunk_path in enumerate(chunk_paths):
-                        transcription = self._transcribe_chunk(chunk_path, i+1, len(chunk_paths), speaker_context)
-                        
-                        # Update speaker context for next chunk if needed
-                        if transcription:
-                            speaker_context = self._extract_speakers(transcription)
+                    # Uploads get their own pool so chunk N+1 is uploading while
+                    # chunk N is being transcribed, instead of every upload
+                    # queueing ahead of the first transcription
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as uploader, \
+                            ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                        uploads = [uploader.submit(self._upload, path) for path in chunk_paths]
                         
-                        transcriptions.append(transcription)
+                        # Transcribe in batches: the first chunk alone establishes who is
+                        # speaking, then each batch runs concurrently with the speaker
+                        # context accumulated from every earlier chunk
+                        start, batch_size = 0, 1
+                        while start < total:
+                            speaker_context = speaker_cache.select(k=2)
+                            batch = range(start, min(total, start + batch_size))
+                            futures = [
+                                executor.submit(self._transcribe_chunk, chunk_paths[i], i+1, total,
+                                                speaker_context, uploads[i])
+                                for i in batch
+                            ]
+                            
+                            for i, future in zip(batch, futures):
+                                transcription = future.result()
+                                if transcription:
+                                    segments, _ = diarizer.process_transcript(transcription)
+                                    speaker_cache.add_observation(i, segments)
+                                transcriptions.append(transcription)
+                                
+                            start, batch_size = batch.stop, self.max_workers
                     
                     # Combine transcriptions with double newlines between chunks
                     return "\n\n".join(transcriptions)
@@ -141,7 +262,8 @@ class GeminiTranscriber(TranscriptionService):
                          chunk_path: str, 
                          chunk_num: Optional[int] = None, 
                          total_chunks: Optional[int] = None,
-                         speaker_context: Optional[List[str]] = None) -> str:
+                         speaker_context: Optional[Dict[str, List[SpeakerSegment]]] = None,
+                         upload: Optional[Future] = None) -> str:
         """
         Transcribe a single audio chunk.
         
@@ -149,7 +271,8 @@ class GeminiTranscriber(TranscriptionService):
             chunk_path: Path to the audio chunk
             chunk_num: Current chunk number (if processing multiple chunks)
             total_chunks: Total number of chunks (if processing multiple chunks)
-            speaker_context: List of speaker names from previous chunks
+            speaker_context: Representative earlier segments per speaker
+            upload: Pending upload of the chunk started ahead of time, if any
             
         Returns:
             str: Transcribed text from the chunk
@@ -158,30 +281,75 @@ class GeminiTranscriber(TranscriptionService):
             # Log progress if processing multiple chunks
             if chunk_num and total_chunks:
                 logging.info(f"Processing chunk {chunk_num}/{total_chunks}...")
+            started = time.monotonic()
             
-            # Upload the audio
-            audio_file = genai.upload_file(chunk_path)
+            # Upload the audio (or wait for the prefetched upload)
+            audio_file = upload.result() if upload else self._upload(chunk_path)
             
             # Prepare prompt
             prompt = ["Please transcribe this audio. Maintain existing speaker labels and formatting."]
             if speaker_context and chunk_num and chunk_num > 1:
-                prompt.append(f"Previous speakers were: {', '.join(speaker_context)}")
+                prompt.append(self._format_speaker_context(speaker_context))
             
             # Generate transcription
-            parts = [audio_file] + prompt
-            response = self.model.generate_content(parts)
+            try:
+                response = self.model.generate_content([audio_file] + prompt)
+            except Exception as e:
+                if 'expired' not in str(e).lower():
+                    raise
+                # A cached handle outlived its TTL on the server; upload once more
+                audio_file = self._upload(chunk_path, refresh=True)
+                response = self.model.generate_content([audio_file] + prompt)
+                
+            # Per-chunk wall-clock, for tuning MAX_CHUNK_SIZE_MB
+            if chunk_num and total_chunks:
+                logging.info(f"Chunk {chunk_num}/{total_chunks} transcribed in {time.monotonic() - started:.1f}s")
             return response.text.strip()
             
         except Exception as e:
             logging.error(f"Error transcribing chunk {chunk_path}: {str(e)}")
             return ""
             
-    def _extract_speakers(self, transcription: str) -> List[str]:
-        """Extract speaker names from transcription for context in next chunk."""
-        speakers = set()
-        for line in transcription.split('\n'):
-            if ':' in line:
-                speaker = line.split(':', 1)[0].strip()
-                if speaker:
-                    speakers.add(speaker)
-        return list(speakers)
\ No newline at end of file
+    def _upload(self, file_path: str, refresh: bool = False) -> Any:
+        """
+        Upload a file to Gemini, reusing an earlier upload of identical content.
+        
+        Args:
+            file_path: Path to the file to upload
+            refresh: Discard any cached handle and upload again
+            
+        Returns:
+            The uploaded file handle
+        """
+        try:
+            digest = hashlib.blake2b()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(self.HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+            key = digest.hexdigest()
+        except OSError:
+            return genai.upload_file(file_path)
+            
+        now = time.time()
+        with self._upload_lock:
+            for stale in [k for k, (ts, _) in self._upload_cache.items()
+                          if now - ts > self.UPLOAD_TTL_SECONDS]:
+                del self._upload_cache[stale]
+            cached = None if refresh else self._upload_cache.get(key)
+        if cached:
+            return cached[1]
+            
+        audio_file = genai.upload_file(file_path)
+        with self._upload_lock:
+            self._upload_cache[key] = (now, audio_file)
+        return audio_file
+        
+    def _format_speaker_context(self, speaker_context: Dict[str, List[SpeakerSegment]],
+                                excerpt_chars: int = 100) -> str:
+        """Render cached speaker segments as a short prompt section for the next chunk."""
+        lines = [f"Previous speakers were: {', '.join(speaker_context)}"]
+        for speaker, segments in speaker_context.items():
+            for segment in segments:
+                excerpt = segment.text[:excerpt_chars]
+                lines.append(f"{speaker} previously said: '{excerpt}'")
+        return "\n".join(lines)
\ No newline at end of file
@@ -0,0 +1,7 @@
+"""Shared helpers for the test suite."""
+
+import os
+
+def tmp_root():
+    """Use tmpfs for scratch audio when the host has a writable /dev/shm."""
+    return '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
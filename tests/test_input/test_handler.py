@@ -2,7 +2,10 @@
 
 import os
 import shutil
+import tempfile
+import wave
 from input.file_handler import AudioFileHandler
+from common.utils import is_pcm16_wav
 
 def test_file_handler():
     # Initialize handler
@@ -46,5 +49,67 @@ def test_file_handler():
     
     print("\nTest complete!")
 
+def _write_wav(path, sampwidth, framerate=16000, channels=1):
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sampwidth)
+        wav_file.setframerate(framerate)
+        wav_file.writeframes(b"\0" * sampwidth * channels * 160)
+
+def test_pcm16_wav_used_in_place():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pcm16 = os.path.join(temp_dir, "pcm16.wav")
+        pcm8 = os.path.join(temp_dir, "pcm8.wav")
+        _write_wav(pcm16, 2)
+        _write_wav(pcm8, 1)
+        
+        assert is_pcm16_wav(pcm16)
+        assert not is_pcm16_wav(pcm8)
+        
+        audio_copy, wav_file = AudioFileHandler().prepare_audio_file(pcm16)
+        assert audio_copy == wav_file == pcm16
+        assert not os.path.exists(os.path.join(temp_dir, "transcripts", "pcm16.wav"))
+
+def test_pcm16_wav_in_other_format_converted():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        stereo = os.path.join(temp_dir, "stereo.wav")
+        _write_wav(stereo, 2, framerate=44100, channels=2)
+        
+        _, wav_file = AudioFileHandler(target_sr=16000, target_channels=1).prepare_audio_file(stereo)
+        
+        assert wav_file != stereo
+        with wave.open(wav_file, 'rb') as converted:
+            assert (converted.getframerate(), converted.getnchannels()) == (16000, 1)
+
+def test_converted_wav_leaves_source_untouched():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pcm8 = os.path.join(temp_dir, "pcm8.wav")
+        _write_wav(pcm8, 1)
+        with open(pcm8, 'rb') as f:
+            original = f.read()
+        handler = AudioFileHandler()
+        
+        audio_copy, wav_file = handler.prepare_audio_file(pcm8)
+        handler.cleanup_processing(pcm8, wav_file)
+        
+        assert wav_file != audio_copy
+        with open(pcm8, 'rb') as f:
+            assert f.read() == original
+        with open(audio_copy, 'rb') as f:
+            assert f.read() == original
+
+def test_stale_audio_copy_replaced():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pcm8 = os.path.join(temp_dir, "pcm8.wav")
+        _write_wav(pcm8, 1)
+        os.makedirs(os.path.join(temp_dir, "transcripts"))
+        with open(os.path.join(temp_dir, "transcripts", "pcm8.wav"), 'wb') as f:
+            f.write(b"an earlier recording")
+        
+        audio_copy, _ = AudioFileHandler().prepare_audio_file(pcm8)
+        
+        with open(pcm8, 'rb') as src, open(audio_copy, 'rb') as copy:
+            assert copy.read() == src.read()
+
 if __name__ == "__main__":
     test_file_handler()
\ No newline at end of file
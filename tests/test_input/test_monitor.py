@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from input.monitor import AudioMonitor, BaseAudioHandler
+
+class _Handler(BaseAudioHandler):
+    def __init__(self, results):
+        super().__init__()
+        self.results = list(results)
+        self.calls = 0
+
+    def _is_valid_file(self, file_path):
+        return True
+
+    def process_audio_file(self, file_path, st=None):
+        self.calls += 1
+        return self.results.pop(0)
+
+def _run_once(handler, path):
+    done = handler.processing_files[path] = threading.Event()
+    handler._run(path, done)
+
+def test_failed_file_is_retried():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "recording.m4a")
+        with open(path, 'wb') as f:
+            f.write(b"audio")
+        handler = _Handler([False, True])
+        
+        with mock.patch('input.monitor.wait_for_stable_file', return_value=True):
+            _run_once(handler, path)
+            _run_once(handler, path)
+            _run_once(handler, path)
+        handler.shutdown()
+        
+        # Retried after the failure, then skipped once it succeeded
+        assert handler.calls == 2
+
+def test_processed_signatures_bounded():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        handler = _Handler([True] * 3)
+        handler.PROCESSED_LIMIT = 2
+        paths = []
+        for name in ("a.m4a", "b.m4a", "c.m4a"):
+            path = os.path.join(temp_dir, name)
+            with open(path, 'wb') as f:
+                f.write(b"audio")
+            paths.append(path)
+            
+        with mock.patch('input.monitor.wait_for_stable_file', return_value=True):
+            for path in paths:
+                _run_once(handler, path)
+        handler.shutdown()
+        
+        assert list(handler._processed) == paths[1:]
+
+def test_start_from_worker_thread():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        handler = _Handler([])
+        monitor = AudioMonitor(temp_dir, handler)
+        errors = []
+        
+        def run():
+            try:
+                monitor.start()
+            except Exception as e:
+                errors.append(e)
+                
+        thread = threading.Thread(target=run)
+        thread.start()
+        while monitor.observer is None or not monitor.observer.is_alive():
+            if not thread.is_alive():
+                break
+            time.sleep(0.01)
+        monitor.observer.stop()
+        thread.join(5)
+        
+        assert not thread.is_alive()
+        assert errors == []
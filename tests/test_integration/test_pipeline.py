@@ -4,20 +4,35 @@ import unittest
 import os
 import tempfile
 import shutil
+import wave
 from pathlib import Path
-import subprocess
+from unittest import mock
+
+import numpy as np
 
 from processing.chunker import AudioChunker
-from processing.transcriber import AudioTranscriber
 from processing.diarizer import SpeakerDiarizer
 from output.formatter import TranscriptFormatter
-from output.analyzer import TitleAnalyzer
 from input.file_handler import AudioFileHandler
+from tests.helpers import tmp_root
+
+# Canned transcription used in place of a cloud API call
+CANNED_TRANSCRIPT = """Stewart: Hi, I'm Stewart Alsop, welcome to the show.
+John: Thanks for having me.
+Stewart: Let's get started."""
 
 class TestAudioProcessingPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Initialize pipeline components once; tests don't depend on their state."""
+        cls.file_handler = AudioFileHandler()
+        cls.chunker = AudioChunker()
+        cls.diarizer = SpeakerDiarizer()
+        cls.formatter = TranscriptFormatter()
+        
     def setUp(self):
         """Set up test environment with temporary directories and test files."""
-        self.test_dir = tempfile.mkdtemp(prefix='test_pipeline_')
+        self.test_dir = tempfile.mkdtemp(prefix='test_pipeline_', dir=tmp_root())
         self.input_dir = os.path.join(self.test_dir, 'input')
         self.output_dir = os.path.join(self.test_dir, 'output')
         
@@ -28,35 +43,27 @@ class TestAudioProcessingPipeline(unittest.TestCase):
         self.test_audio = os.path.join(self.input_dir, 'test.wav')
         self._create_test_audio()
         
-        # Initialize components
-        self.file_handler = AudioFileHandler()
-        self.chunker = AudioChunker()
-        self.transcriber = AudioTranscriber()
-        self.diarizer = SpeakerDiarizer()
-        self.formatter = TranscriptFormatter()
-        
     def tearDown(self):
         """Clean up temporary files."""
         shutil.rmtree(self.test_dir)
         
     def _create_test_audio(self):
-        """Create a test WAV file with speech-like content."""
-        command = [
-            'ffmpeg',
-            '-f', 'lavfi',
-            '-i', 'sine=frequency=440:duration=5',
-            '-acodec', 'pcm_s16le',
-            '-ar', '44100',
-            self.test_audio,
-            '-y'
-        ]
-        subprocess.run(command, check=True, capture_output=True)
+        """Create a 5 second 440 Hz test WAV file."""
+        sample_rate = 44100
+        t = np.arange(5 * sample_rate, dtype=np.float32) / sample_rate
+        samples = (np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
         
-    def test_full_pipeline(self):
-        """Test the complete audio processing pipeline."""
+        with wave.open(self.test_audio, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(samples.tobytes())
+        
+    def _run_pipeline(self, transcriber) -> str:
+        """Run the test audio through every pipeline stage and return the written output."""
         # Step 1: File Detection and Validation
         self.assertTrue(
-            self.file_handler.is_valid_audio(self.test_audio),
+            self.file_handler.is_valid_file(self.test_audio),
             "File handler should recognize test audio"
         )
         
@@ -65,15 +72,8 @@ class TestAudioProcessingPipeline(unittest.TestCase):
         self.assertIsInstance(chunks, list, "Chunking should return a list")
         
         # Step 3: Transcription
-        transcription = None
-        for chunk in chunks:
-            chunk_trans = self.transcriber.transcribe(chunk)
-            if transcription is None:
-                transcription = chunk_trans
-            else:
-                transcription += "\n" + chunk_trans
-        
-        self.assertIsNotNone(transcription, "Transcription should not be None")
+        transcription = "\n".join(transcriber.transcribe_audio(chunk) for chunk in chunks)
+        self.assertTrue(transcription, "Transcription should not be empty")
         
         # Step 4: Speaker Diarization
         segments, speaker_mapping = self.diarizer.process_transcript(transcription)
@@ -102,7 +102,7 @@ class TestAudioProcessingPipeline(unittest.TestCase):
         
         with open(output_path, 'w') as f:
             f.write(formatted_transcript)
-            
+        
         self.assertTrue(
             os.path.exists(output_path),
             "Output file should be created"
@@ -113,21 +113,43 @@ class TestAudioProcessingPipeline(unittest.TestCase):
             content = f.read()
             self.assertIn("# Transcript", content)
             self.assertIn(metadata["File"], content)
-            
+        return content
+        
+    def test_pipeline_contract(self):
+        """Test the stages are wired together, with chunking and transcription mocked."""
+        transcriber = mock.Mock(spec=['transcribe_audio'])
+        transcriber.transcribe_audio.return_value = CANNED_TRANSCRIPT
+        
+        with mock.patch.object(self.chunker, 'chunk_audio',
+                               return_value=([self.test_audio], False)):
+            content = self._run_pipeline(transcriber)
+        
+        transcriber.transcribe_audio.assert_called_once_with(self.test_audio)
+        self.assertIn("Stewart Alsop", content)
+        self.assertIn("Thanks for having me.", content)
+        
+    @unittest.skipUnless(os.getenv('RUN_SLOW'), "set RUN_SLOW=1 to call the Gemini API")
+    def test_full_pipeline(self):
+        """Test the complete audio processing pipeline."""
+        # Imported here so the fast tests never load the cloud client libraries
+        from processing.transcriber import GeminiTranscriber
+        self._run_pipeline(GeminiTranscriber())
+        
     def test_error_handling(self):
         """Test error handling throughout the pipeline."""
         # Test invalid file
         invalid_file = os.path.join(self.input_dir, "invalid.wav")
         with open(invalid_file, 'w') as f:
             f.write("Not an audio file")
-            
-        with self.assertRaises(Exception):
-            self.file_handler.is_valid_audio(invalid_file)
-            
+        
+        with self.assertRaises(RuntimeError):
+            self.chunker.chunk_audio(invalid_file)
+        
         # Test missing file
         missing_file = os.path.join(self.input_dir, "missing.wav")
-        with self.assertRaises(FileNotFoundError):
+        self.assertFalse(self.file_handler.is_valid_file(missing_file))
+        with self.assertRaises(RuntimeError):
             self.chunker.chunk_audio(missing_file)
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
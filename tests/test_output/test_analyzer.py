@@ -4,18 +4,27 @@ import unittest
 from unittest.mock import Mock, patch
 import tempfile
 import os
+import re
 from datetime import datetime
 from output.analyzer import TitleAnalyzer
 
+# Footer line stamped on every formatted analysis
+_TIMESTAMP_RE = re.compile(r"Analysis generated on: \d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
 class MockResponse:
     def __init__(self, text):
         self.text = text
 
 class TestTitleAnalyzer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Create one mock model and analyzer; TitleAnalyzer never mutates the model."""
+        cls.mock_model = Mock()
+        cls.analyzer = TitleAnalyzer(cls.mock_model)
+        
     def setUp(self):
-        """Create a new analyzer instance before each test."""
-        self.mock_model = Mock()
-        self.analyzer = TitleAnalyzer(self.mock_model)
+        """Clear calls and canned responses left by the previous test."""
+        self.mock_model.reset_mock(return_value=True, side_effect=True)
         
     def test_analyze_transcript(self):
         """Test basic transcript analysis."""
@@ -49,20 +58,19 @@ Test analysis content"""
         """Test saving analysis to file."""
         analysis_text = "Test analysis content"
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+        # Save into a temporary directory, removed even if an assertion fails
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, 'analysis.md')
+            
             # Test saving
-            success = self.analyzer.save_analysis(analysis_text, tmp.name)
+            success = self.analyzer.save_analysis(analysis_text, output_path)
             self.assertTrue(success)
             
             # Verify content
-            with open(tmp.name, 'r') as f:
+            with open(output_path, 'r') as f:
                 content = f.read()
                 self.assertEqual(content, analysis_text)
                 
-        # Cleanup
-        os.unlink(tmp.name)
-        
     def test_save_analysis_error(self):
         """Test error handling when saving fails."""
         # Try to save to an invalid path
@@ -75,7 +83,7 @@ Test analysis content"""
         formatted = self.analyzer._format_markdown(test_text)
         
         # Verify timestamp and content
-        self.assertRegex(formatted, r"Analysis generated on: \d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+        self.assertRegex(formatted, _TIMESTAMP_RE)
         self.assertIn(test_text, formatted)
 
 if __name__ == '__main__':
@@ -2,7 +2,7 @@
 
 import unittest
 from datetime import datetime
-from output.formatter import TranscriptFormatter
+from output.formatter import TranscriptFormatter, format_transcript
 
 class TestTranscriptFormatter(unittest.TestCase):
     def setUp(self):
@@ -32,6 +32,20 @@ class TestTranscriptFormatter(unittest.TestCase):
         for key, value in metadata.items():
             self.assertIn(f"**{key}**: {value}", formatted)
 
+    def test_metadata_not_kept_between_calls(self):
+        """Test metadata from one call doesn't leak into the next."""
+        self.formatter.format_transcript("First", {"File": "first.m4a"})
+        formatted = self.formatter.format_transcript("Second")
+        
+        self.assertNotIn("first.m4a", formatted)
+
+    def test_module_function(self):
+        """Test the module-level function matches the class wrapper."""
+        raw_text = "Stewart: Hello\nJohn: Hi"
+        
+        self.assertEqual(format_transcript(raw_text, generated_at="now"),
+                         self.formatter.format_transcript(raw_text, generated_at="now"))
+
     def test_speaker_detection(self):
         """Test speaker line detection and formatting."""
         raw_text = """
@@ -46,6 +60,18 @@ Stewart: Let's begin
         self.assertIn("**John**:", formatted)
         self.assertIn("Some normal text", formatted)
 
+    def test_generated_at(self):
+        """Test a caller-supplied timestamp is used in the header."""
+        formatted = self.formatter.format_transcript("Test content", generated_at="2024-01-02 03:04:05")
+        
+        self.assertIn("**Generated**: 2024-01-02 03:04:05", formatted)
+
+    def test_speaker_name_escaped(self):
+        """Test markdown characters in speaker names are escaped."""
+        formatted = self.formatter.format_transcript("Dr_Who*: Hello")
+        
+        self.assertIn(r"**Dr\_Who\***: Hello", formatted)
+
     def test_empty_content(self):
         """Test handling of empty content."""
         formatted = self.formatter.format_transcript("")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+from output.writer import write_file
+
+class TestWriteFile(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory before each test."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_overwrites(self):
+        """Test text lands on disk when write_file returns, replacing old content."""
+        path = os.path.join(self.temp_dir.name, "transcript.md")
+        with open(path, 'w') as f:
+            f.write("stale content that is longer than the new one")
+
+        write_file(path, "# Transcript\n\nSpeaker 1: Héllo")
+
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "# Transcript\n\nSpeaker 1: Héllo")
+
+    def test_failed_write_raises(self):
+        """Test an unwritable path is reported to the caller."""
+        bad_path = os.path.join(self.temp_dir.name, "missing", "transcript.md")
+
+        with self.assertRaises(OSError):
+            write_file(bad_path, "lost")
+
+if __name__ == '__main__':
+    unittest.main()
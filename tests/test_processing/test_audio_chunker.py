@@ -4,69 +4,70 @@ import unittest
 import os
 import shutil
 import tempfile
-import subprocess
+import wave
 from pathlib import Path
-from processing.chunker import AudioChunker
+from unittest import mock
+
+import numpy as np
+
+from processing.chunker import AudioChunker, _probe_format
+from tests.helpers import tmp_root
+
+# Splitting runs ffmpeg; everything else here works in-process
+_HAS_FFMPEG = shutil.which('ffmpeg') is not None
 
 class TestAudioChunker(unittest.TestCase):
-    def setUp(self):
-        """Create temporary directory and test files before each test."""
-        self.test_dir = tempfile.mkdtemp(prefix='test_audio_chunker_')
-        self.small_file = os.path.join(self.test_dir, 'small.wav')
-        self.large_file = os.path.join(self.test_dir, 'large.wav')
-        self.silence_file = os.path.join(self.test_dir, 'silence.wav')
+    @classmethod
+    def setUpClass(cls):
+        """Create the test audio files once for the whole class."""
+        cls._tmp = tempfile.TemporaryDirectory(prefix='test_audio_chunker_', dir=tmp_root())
+        cls.fixtures_dir = cls._tmp.name
+        cls.small_file = os.path.join(cls.fixtures_dir, 'small.wav')
+        cls.large_file = os.path.join(cls.fixtures_dir, 'large.wav')
+        cls.silence_file = os.path.join(cls.fixtures_dir, 'silence.wav')
         
         # Create test audio files
-        self._create_test_files()
+        cls._create_test_files()
+        
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared test audio files and every test's scratch directory."""
+        cls._tmp.cleanup()
+        
+    def setUp(self):
+        """Create a scratch directory and chunker before each test."""
+        # Removed with the class directory, so there's no per-test teardown
+        self.test_dir = os.path.join(self.fixtures_dir, self._testMethodName)
+        os.makedirs(self.test_dir)
         
         # Initialize chunker with smaller chunk size for testing
         self.chunker = AudioChunker(max_chunk_size_mb=1.0)
         
-    def tearDown(self):
-        """Clean up temporary files after each test."""
-        if hasattr(self, 'test_dir') and os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
-            
-    def _create_test_files(self):
-        """Create test audio files of different sizes and patterns."""
+    @classmethod
+    def _create_test_files(cls, sample_rate: int = 44100):
+        """Create test audio files of different sizes and patterns from one 440 Hz tone."""
+        t = np.arange(20 * sample_rate, dtype=np.float32) / sample_rate
+        tone = (np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+        
         # Create 500KB file (small)
-        self._create_audio_file(
-            self.small_file,
-            duration=5,
-            content="sine=440"  # Simple sine wave
-        )
+        cls._create_audio_file(cls.small_file, tone[:5 * sample_rate], sample_rate)
         
         # Create 2MB file (large)
-        self._create_audio_file(
-            self.large_file,
-            duration=20,
-            content="sine=440"
-        )
-        
-        # Create file with silence points
-        self._create_audio_file(
-            self.silence_file,
-            duration=10,
-            content="sine=440[s1];anullsrc=r=44100:cl=mono[s2];[s1][s2]concat=n=2:v=0:a=1"
-        )
-        
-    def _create_audio_file(self, filename: str, duration: int, content: str):
-        """Create a test audio file using ffmpeg."""
-        command = [
-            'ffmpeg',
-            '-f', 'lavfi',  # Use libavfilter virtual input
-            '-i', content,  # Audio content specification
-            '-t', str(duration),  # Duration in seconds
-            '-acodec', 'pcm_s16le',  # Same format as main converter
-            '-ar', '44100',  # Same sample rate as main converter
-            filename,
-            '-y'  # Overwrite if exists
-        ]
-        
-        try:
-            subprocess.run(command, check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Error creating test audio file: {e.stderr.decode()}")
+        cls._create_audio_file(cls.large_file, tone, sample_rate)
+        
+        # Create file with a silent gap between two tones
+        silence = tone[:10 * sample_rate].copy()
+        silence[4 * sample_rate:6 * sample_rate] = 0
+        cls._create_audio_file(cls.silence_file, silence, sample_rate)
+        
+    @staticmethod
+    def _create_audio_file(filename: str, samples: "np.ndarray", sample_rate: int):
+        """Write 16-bit mono samples as a WAV file (same format as the main converter)."""
+        with wave.open(filename, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(samples.tobytes())
             
     def test_needs_chunking(self):
         """Test the needs_chunking method."""
@@ -86,6 +87,39 @@ class TestAudioChunker(unittest.TestCase):
         # Silence points should be sorted
         self.assertEqual(silence_points, sorted(silence_points))
         
+    def test_silence_points_cached(self):
+        """Test silence points are reused from cache_dir on a second run."""
+        chunker = AudioChunker(cache_dir=os.path.join(self.test_dir, 'cache'))
+        with mock.patch.object(chunker, '_scan_silence_points', return_value=[4.0]) as scan:
+            self.assertEqual(chunker._detect_silence_points(self.small_file), [4.0])
+            self.assertEqual(chunker._detect_silence_points(self.small_file), [4.0])
+            
+        scan.assert_called_once_with(self.small_file)
+        
+    @mock.patch('processing.chunker.subprocess.Popen')
+    def test_parse_silencedetect_output(self, mock_popen):
+        """Test silence ends are parsed from canned silencedetect output."""
+        mock_popen.return_value.stderr = iter([
+            b"[silencedetect @ 0x1] silence_start: 5.0\n",
+            b"[silencedetect @ 0x1] silence_end: 7.0 | silence_duration: 2.0\n",
+            b"size=N/A time=00:00:10.00 bitrate=N/A\n",
+            b"[silencedetect @ 0x1] silence_end: 3.25 | silence_duration: 1.5\n",
+        ])
+        
+        self.assertEqual(self.chunker._detect_silence_points_ffmpeg('canned.wav'), [3.25, 7.0])
+        
+    @mock.patch('processing.chunker.subprocess.Popen')
+    def test_parse_ffprobe_output(self, mock_popen):
+        """Test duration and bit rate are parsed from canned ffprobe output."""
+        mock_popen.return_value.communicate.return_value = (
+            b'{"format": {"duration": "12.5", "bit_rate": "128000"}}', b'')
+        mock_popen.return_value.returncode = 0
+        
+        probe = _probe_format('canned.m4a', 0, 0)
+        
+        self.assertEqual(probe, {'duration': 12.5, 'bit_rate': 128000.0})
+        _probe_format.cache_clear()
+        
     def test_get_audio_duration(self):
         """Test audio duration detection."""
         # Test small file (5 seconds)
@@ -105,6 +139,7 @@ class TestAudioChunker(unittest.TestCase):
         self.assertEqual(chunk_paths[0], self.small_file)
         self.assertFalse(was_chunked)
         
+    @unittest.skipUnless(_HAS_FFMPEG, 'ffmpeg not installed')
     def test_chunk_audio_large_file(self):
         """Test chunking with a file that needs chunking."""
         chunk_paths, was_chunked = self.chunker.chunk_audio(self.large_file)
@@ -114,16 +149,19 @@ class TestAudioChunker(unittest.TestCase):
         self.assertTrue(was_chunked)
         
         # Each chunk should exist and be smaller than max size
-        for chunk_path in chunk_paths:
-            self.assertTrue(os.path.exists(chunk_path))
-            chunk_size = os.path.getsize(chunk_path) / (1024 * 1024)  # Size in MB
-            self.assertLessEqual(chunk_size, self.chunker.max_chunk_size_mb)
+        limit = self.chunker.max_chunk_size_mb
+        sizes = np.fromiter((os.stat(path).st_size for path in chunk_paths),
+                            dtype=np.float64, count=len(chunk_paths)) / (1024 * 1024)  # Size in MB
+        self.assertTrue(np.all(sizes <= limit),
+                        f"Chunks over {limit} MB: {[p for p, s in zip(chunk_paths, sizes) if s > limit]}")
             
+    @unittest.skipUnless(_HAS_FFMPEG, 'ffmpeg not installed')
     def test_context_manager(self):
         """Test the context manager functionality."""
-        with AudioChunker() as chunker:
+        with AudioChunker(max_chunk_size_mb=1.0) as chunker:
             # Create some chunks
             chunk_paths, was_chunked = chunker.chunk_audio(self.large_file)
+            self.assertTrue(was_chunked)
             temp_dir = chunker.temp_dir
             
             # Temp directory should exist
@@ -135,7 +173,27 @@ class TestAudioChunker(unittest.TestCase):
                 
         # After context exit, temp directory should be cleaned up
         self.assertFalse(os.path.exists(temp_dir))
-        
+
+    def test_temp_root(self):
+        """Test chunks go under temp_root, falling back when it lacks space."""
+        chunker = AudioChunker(temp_root=self.test_dir)
+        self.assertEqual(os.path.dirname(chunker._create_temp_dir()), self.test_dir)
+        chunker._cleanup_temp_dir()
+
+        temp_dir = chunker._create_temp_dir(min_free_bytes=1 << 62)
+        self.assertEqual(os.path.dirname(temp_dir), tempfile.gettempdir())
+        chunker._cleanup_temp_dir()
+
+    def test_temp_root_in_context_manager(self):
+        """Test the temp_root space check also applies inside a with block."""
+        full = mock.Mock(free=0)
+        with AudioChunker(temp_root=self.test_dir) as chunker, \
+                mock.patch('processing.chunker.shutil.disk_usage', return_value=full), \
+                mock.patch.object(chunker, '_segment_at_points', return_value=[]):
+            chunker._split_at_points(self.small_file, [1.0])
+            
+            self.assertEqual(os.path.dirname(chunker.temp_dir), tempfile.gettempdir())
+
     def test_nonexistent_file(self):
         """Test handling of nonexistent files."""
         with self.assertRaises(Exception):
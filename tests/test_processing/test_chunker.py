@@ -54,6 +54,8 @@ class TestAudioChunker(unittest.TestCase):
         """Create a test audio file using ffmpeg."""
         command = [
             'ffmpeg',
+            '-nostats',
+            '-loglevel', 'error',  # Only failures are ever read
             '-f', 'lavfi',  # Use libavfilter virtual input
             '-i', content,  # Audio content specification
             '-t', str(duration),  # Duration in seconds
@@ -64,9 +66,11 @@ class TestAudioChunker(unittest.TestCase):
         ]
         
         try:
-            subprocess.run(command, check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Error creating test audio file: {e.stderr.decode()}")
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except subprocess.CalledProcessError:
+            # Output is only worth reading on failure; re-run to capture it
+            result = subprocess.run(command, capture_output=True)
+            raise RuntimeError(f"Error creating test audio file: {result.stderr.decode()}")
             
     def test_needs_chunking(self):
         """Test the needs_chunking method."""
@@ -121,8 +125,9 @@ class TestAudioChunker(unittest.TestCase):
             
     def test_context_manager(self):
         """Test the context manager functionality."""
-        with AudioChunker() as chunker:
+        with AudioChunker(max_chunk_size_mb=1.0) as chunker:
             chunk_paths, was_chunked = chunker.chunk_audio(self.large_file)
+            self.assertTrue(was_chunked)
             
             # Verify temp directory exists and capture its path
             self.assertIsNotNone(chunker.temp_dir)
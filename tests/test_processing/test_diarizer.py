@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 
 import unittest
-from processing.diarizer import SpeakerDiarizer, SpeakerSegment
+from processing.diarizer import SpeakerAwareCache, SpeakerDiarizer, SpeakerSegment
 from typing import Dict, List
 
 class TestSpeakerDiarizer(unittest.TestCase):
-    def setUp(self):
-        """Create a new diarizer instance before each test."""
-        self.diarizer = SpeakerDiarizer()
+    @classmethod
+    def setUpClass(cls):
+        """Create one diarizer for the class; process_transcript keeps no state between calls."""
+        cls.diarizer = SpeakerDiarizer()
         
     def test_basic_speaker_detection(self):
         """Test detection of basic speaker formats."""
@@ -33,6 +34,20 @@ class TestSpeakerDiarizer(unittest.TestCase):
         self.assertTrue(any('john smith' in key for key in mapping.keys()))
         self.assertEqual(mapping["stewart alsop"], "Stewart Alsop")
         
+    def test_overlapping_introductions(self):
+        """Test a line matching both introduction forms yields both names."""
+        self.assertEqual(self.diarizer._find_introductions("Host: Hey, this is Bob here."),
+                         ['bob here', 'this is bob'])
+        
+        segments, mapping = self.diarizer.process_transcript("Host: Hey, this is Bob here.")
+        self.assertIn("Bob", mapping.values())
+        
+    def test_introduction_across_lines(self):
+        """Test an introduction that wraps onto the next line is still found."""
+        segments, mapping = self.diarizer.process_transcript("Guest: Hi I'm\nAlice, nice")
+        
+        self.assertIn("alice", mapping)
+        
     def test_numbered_speaker_format(self):
         """Test handling of numbered speaker format."""
         transcript = """
@@ -88,5 +103,38 @@ class TestSpeakerDiarizer(unittest.TestCase):
         self.assertEqual(len(segments), 0)
         self.assertEqual(len(mapping), 0)
 
+class TestSpeakerAwareCache(unittest.TestCase):
+    def _segment(self, speaker: str, duration: float) -> SpeakerSegment:
+        return SpeakerSegment(speaker_id=speaker, start_time=0.0, end_time=duration, text=f"{speaker} {duration}")
+        
+    def test_select_keeps_longest_segments_per_speaker(self):
+        """Test that each speaker keeps its top-k segments by score."""
+        cache = SpeakerAwareCache(total_chunks=2)
+        cache.add_observation(0, [self._segment("Stewart", d) for d in (1.0, 5.0, 3.0)])
+        cache.add_observation(0, [self._segment("John", 2.0)])
+        
+        selection = cache.select(k=2)
+        
+        self.assertEqual([s.end_time for s in selection["Stewart"]], [5.0, 3.0])
+        self.assertEqual(len(selection["John"]), 1)
+        
+    def test_recent_chunks_score_higher(self):
+        """Test that equal-length segments from later chunks win."""
+        cache = SpeakerAwareCache(total_chunks=4, alpha=0.5)
+        early = self._segment("Stewart", 2.0)
+        late = self._segment("Stewart", 2.0)
+        cache.add_observation(0, [early])
+        cache.add_observation(3, [late])
+        
+        self.assertIs(cache.select(k=1)["Stewart"][0], late)
+        
+    def test_heap_is_bounded(self):
+        """Test that per-speaker storage never exceeds max_per_speaker."""
+        cache = SpeakerAwareCache(total_chunks=1, max_per_speaker=3)
+        cache.add_observation(0, [self._segment("Stewart", float(d)) for d in range(10)])
+        
+        selection = cache.select(k=10)
+        self.assertEqual([s.end_time for s in selection["Stewart"]], [9.0, 8.0, 7.0])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,18 +1,17 @@
 #!/usr/bin/env python3
 
+import os
+import tempfile
 import unittest
+import wave
+from types import ModuleType, SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
 
-# Create module structure for mocks
-import sys
-from types import ModuleType
+from common import services
+from processing.transcriber import TranscriptionService, CloudSpeechTranscriber, GeminiTranscriber
 
 # Mock google cloud speech
-mock_cloud = ModuleType('google.cloud')
 mock_speech = ModuleType('google.cloud.speech')
-sys.modules['google'] = ModuleType('google')
-sys.modules['google.cloud'] = mock_cloud
-sys.modules['google.cloud.speech'] = mock_speech
 # Set up speech recognition mocks
 class MockAudioEncoding:
     LINEAR16 = "LINEAR16"
@@ -32,7 +31,6 @@ mock_speech.RecognitionConfig = MockConfig
 
 # Mock google generative AI
 mock_genai = ModuleType('google.generativeai')
-sys.modules['google.generativeai'] = mock_genai
 mock_genai.configure = Mock()
 
 class MockGenerativeModel(Mock):
@@ -41,13 +39,27 @@ class MockGenerativeModel(Mock):
         self.generate_content = Mock()
 
 mock_genai.GenerativeModel = MockGenerativeModel
-mock_genai.upload_file = Mock()
 mock_genai.upload_file = Mock
 
-# Now import the module under test
-from processing.transcriber import TranscriptionService, CloudSpeechTranscriber, GeminiTranscriber
-import google.generativeai as genai
-from google.cloud import speech
+# Swap the mocks in for the transcriber's client modules only while this
+# module's tests run, leaving sys.modules and other test modules untouched
+_client_patch = patch.multiple('processing.transcriber', speech=mock_speech, genai=mock_genai)
+_services_patch = patch('common.services.genai', mock_genai)
+
+def setUpModule():
+    _client_patch.start()
+    _services_patch.start()
+    services.configure_genai.cache_clear()
+
+def tearDownModule():
+    _services_patch.stop()
+    _client_patch.stop()
+    services.configure_genai.cache_clear()
+
+def _make_response(words):
+    """Build a recognize() response with one result from (speaker_tag, word) pairs."""
+    return Mock(results=[Mock(alternatives=[Mock(words=[Mock(speaker_tag=tag, word=word)
+                                                         for tag, word in words])])])
 
 class TestCloudSpeechTranscriber(unittest.TestCase):
     def setUp(self):
@@ -59,25 +71,16 @@ class TestCloudSpeechTranscriber(unittest.TestCase):
         mock_client = mock_client_class.return_value
         
         # Setup mock response
-        mock_word = Mock()
-        mock_word.speaker_tag = 1
-        mock_word.word = "hello"
-        
-        mock_alternative = Mock()
-        mock_alternative.words = [mock_word]
-        
-        mock_result = Mock()
-        mock_result.alternatives = [mock_alternative]
-        
-        mock_response = Mock()
-        mock_response.results = [mock_result]
+        mock_response = _make_response([(1, "hello")])
         
         # Configure mock client
         mock_client.recognize.return_value = mock_response
         self.transcriber.client = mock_client  # Replace the client instance
         
         # Test transcription
-        with patch('builtins.open', unittest.mock.mock_open(read_data=b'fake_audio_data')):
+        # Only the transcriber's own open() sees the fake audio
+        with patch('processing.transcriber.open', unittest.mock.mock_open(read_data=b'fake_audio_data'),
+                   create=True):
             result = self.transcriber.transcribe_audio("fake_path.wav")
         
         self.assertIn("Speaker 1: hello", result)
@@ -88,27 +91,16 @@ class TestCloudSpeechTranscriber(unittest.TestCase):
         mock_client = mock_client_class.return_value
         
         # Setup mock words for multiple speakers
-        mock_words = [
-            Mock(speaker_tag=1, word="Hello"),
-            Mock(speaker_tag=2, word="Hi"),
-            Mock(speaker_tag=1, word="there"),
-        ]
-        
-        mock_alternative = Mock()
-        mock_alternative.words = mock_words
-        
-        mock_result = Mock()
-        mock_result.alternatives = [mock_alternative]
-        
-        mock_response = Mock()
-        mock_response.results = [mock_result]
+        mock_response = _make_response([(1, "Hello"), (2, "Hi"), (1, "there")])
         
         # Configure mock client
         mock_client.recognize.return_value = mock_response
         self.transcriber.client = mock_client  # Replace the client instance
         
         # Test transcription
-        with patch('builtins.open', unittest.mock.mock_open(read_data=b'fake_audio_data')):
+        # Only the transcriber's own open() sees the fake audio
+        with patch('processing.transcriber.open', unittest.mock.mock_open(read_data=b'fake_audio_data'),
+                   create=True):
             result = self.transcriber.transcribe_audio("fake_path.wav")
         
         expected_lines = [
@@ -119,6 +111,59 @@ class TestCloudSpeechTranscriber(unittest.TestCase):
         for line in expected_lines:
             self.assertIn(line, result)
 
+    def test_long_audio_uses_long_running_recognize(self):
+        mock_client = Mock()
+        mock_client.long_running_recognize.return_value.result.return_value = _make_response([(1, "hello")])
+        self.transcriber.client = mock_client
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            wav_path = self._write_long_wav(tmp)
+            result = self.transcriber.transcribe_audio(wav_path)
+            
+        self.assertIn("Speaker 1: hello", result)
+        mock_client.recognize.assert_not_called()
+        self.assertEqual(
+            mock_client.long_running_recognize.call_args.kwargs['config'].sample_rate_hertz, 8000)
+
+    def _write_long_wav(self, tmp):
+        """Write two minutes of 8 kHz mono silence and return its path."""
+        wav_path = os.path.join(tmp, "long.wav")
+        with wave.open(wav_path, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(8000)
+            wav_file.writeframes(b"\0\0" * 8000 * 120)
+        return wav_path
+
+    def test_long_audio_staged_in_bucket(self):
+        mock_client = Mock()
+        mock_client.long_running_recognize.return_value.result.return_value = _make_response([(1, "hello")])
+        self.transcriber.client = mock_client
+        self.transcriber.bucket = Mock()
+        blob = self.transcriber.bucket.blob.return_value
+        blob.bucket.name, blob.name = "staging", "speech/abc/long.wav"
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            wav_path = self._write_long_wav(tmp)
+            result = self.transcriber.transcribe_audio(wav_path)
+            
+        self.assertIn("Speaker 1: hello", result)
+        blob.upload_from_filename.assert_called_once_with(wav_path, content_type='audio/wav')
+        self.assertEqual(mock_client.long_running_recognize.call_args.kwargs['audio'].uri,
+                         "gs://staging/speech/abc/long.wav")
+        blob.delete.assert_called_once()
+
+    def test_oversized_inline_audio_rejected(self):
+        self.transcriber.client = Mock()
+        self.transcriber.INLINE_LIMIT_BYTES = 1024
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            wav_path = self._write_long_wav(tmp)
+            with self.assertRaises(ValueError):
+                self.transcriber.transcribe_audio(wav_path)
+                
+        self.transcriber.client.long_running_recognize.assert_not_called()
+
 class TestGeminiTranscriber(unittest.TestCase):
     def setUp(self):
         self.transcriber = GeminiTranscriber()
@@ -126,9 +171,8 @@ class TestGeminiTranscriber(unittest.TestCase):
     @patch('processing.transcriber.AudioChunker')
     def test_transcribe_single_file(self, mock_chunker_class):
         # Configure the transcriber's model mock
-        mock_response = Mock()
-        mock_response.text = "Speaker 1: Test transcription"
-        self.transcriber.model.generate_content.return_value = mock_response
+        self.transcriber.model.generate_content.return_value = SimpleNamespace(
+            text="Speaker 1: Test transcription")
         
         # Setup chunker mock
         mock_chunker = mock_chunker_class.return_value
@@ -144,8 +188,8 @@ class TestGeminiTranscriber(unittest.TestCase):
     def test_transcribe_chunked_file(self, mock_chunker_class):
         # Configure responses for each chunk
         mock_responses = [
-            Mock(text="Speaker 1: First chunk"),
-            Mock(text="Speaker 1: Second chunk")
+            SimpleNamespace(text="Speaker 1: First chunk"),
+            SimpleNamespace(text="Speaker 1: Second chunk")
         ]
         self.transcriber.model.generate_content.side_effect = mock_responses
         
@@ -160,14 +204,53 @@ class TestGeminiTranscriber(unittest.TestCase):
         expected_text = "Speaker 1: First chunk\n\nSpeaker 1: Second chunk"
         self.assertEqual(result.strip(), expected_text)
     
-    def test_extract_speakers(self):
-        transcription = """
-        Speaker 1: Hello there
-        John: Hi everyone
-        Speaker 1: How are you?
-        """
-        speakers = self.transcriber._extract_speakers(transcription)
-        self.assertCountEqual(speakers, ["Speaker 1", "John"])
+    @patch('processing.transcriber.genai.upload_file', side_effect=lambda path: path)
+    @patch('processing.transcriber.AudioChunker')
+    def test_transcribe_chunked_file_preserves_order(self, mock_chunker_class, mock_upload):
+        # Echo each uploaded chunk so the output reveals chunk order
+        self.transcriber.model.generate_content.side_effect = (
+            lambda parts: SimpleNamespace(text=f"Speaker 1: {parts[0]}"))
+        
+        chunks = [f"chunk{i}.wav" for i in range(1, 6)]
+        mock_chunker = mock_chunker_class.return_value
+        mock_chunker.__enter__.return_value = mock_chunker
+        mock_chunker.chunk_audio.return_value = (chunks, True)
+        
+        result = self.transcriber.transcribe_audio("large_file.wav")
+        
+        expected_text = "\n\n".join(f"Speaker 1: {chunk}" for chunk in chunks)
+        self.assertEqual(result, expected_text)
+    
+    @patch('processing.transcriber.genai.upload_file')
+    def test_upload_reuses_handle_for_identical_content(self, mock_upload):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, name) for name in ("a.wav", "b.wav", "c.wav")]
+            for path, data in zip(paths, (b"same", b"same", b"different")):
+                with open(path, 'wb') as f:
+                    f.write(data)
+                    
+            first, second, _ = (self.transcriber._upload(path) for path in paths)
+            
+        self.assertIs(first, second)
+        self.assertEqual(mock_upload.call_count, 2)
+        
+    def test_upload_passes_upload_file_handle_through(self):
+        # Unreadable paths skip the cache but still upload by path
+        with patch('processing.transcriber.genai.upload_file') as mock_upload:
+            handle = self.transcriber._upload("missing.wav")
+            
+        mock_upload.assert_called_once_with("missing.wav")
+        self.assertIs(handle, mock_upload.return_value)
+        
+    def test_client_configured_once(self):
+        # The transcriber and the shared analysis model use one configure call
+        services.configure_genai.cache_clear()
+        with patch.object(mock_genai, 'configure') as mock_configure:
+            GeminiTranscriber()
+            GeminiTranscriber()
+            services.configure_genai()
+            
+        mock_configure.assert_called_once()
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file